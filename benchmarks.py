@@ -0,0 +1,677 @@
+import ast
+import gc
+import glob
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import requests
+
+from time import time
+from datetime import datetime
+
+from cache import ResponseCache
+from cube import MONTHS, AggregateCube
+from data import Data
+from mock_servers import MockAirtable, MockIGDB, fakeIGDBTables
+from network import HttpClient, decodeJSON
+from profiling import profiler
+from storage import FrameBuilder, loadFrame, saveFrame
+from util import extractFromAirtable, loadToAirtable, parseStr, parseStrColumn, removeEmptyLists, removeNaFromLists
+from visualization import engines_fig, engines_years_fig, genres_categories_fig, languages_fig, releases_fig
+
+#Uso: python benchmarks.py [nombre ...]
+#Sin argumentos se ejecutan todos los benchmarks.
+
+#Categorías de IGDB, igual que en el notebook
+CATEGORIES = {0 : 'main_game', 1 : 'dlc_addon', 2 : 'expansion', 3 : 'bundle', 4 : 'standalone_expansion', 5 : 'mod', 6 : 'episode', 7 : 'season',
+              8 : 'remake', 9 : 'remaster', 10 : 'expanded_game', 11 : 'port', 12 : 'fork', 13 : 'pack', 14 : 'update'}
+
+def _timeit(func, *args, **kwargs):
+    start = time()
+    result = func(*args, **kwargs)
+    return result, time() - start
+
+def _notebookData(tables, main = True):
+    #Instancia con las tablas falsas y las tablas de referencia ya preparadas; [main] para cargar también games
+    data = Data('mock', 'mock')
+    data.main = pd.DataFrame(tables['games']) if main else None
+    data.dataframes = {name : pd.DataFrame(rows) for name, rows in tables.items() if name != 'games'}
+    data.splitColumn(data_frame = 'language_supports', column = 'language', query_field = 'language_support_type', queries = [1, 2], inplace = True)
+    return data
+
+def _notebookSteps():
+    #Transformaciones de main.ipynb sobre data.main, las mismas con la tabla entera o por bloques (Data.transformChunks).
+    #Los pasos que no son funciones se miden como etapas
+    def columns(data):
+        for column in ['game_engines', 'first_release_date', 'genres', 'category']:
+            if column not in data.main.columns:
+                data.main[column] = np.nan
+
+    def languages(data):
+        data.main['audio_language_supports'] = data.main['language_supports']
+        data.main['subtitles_language_supports'] = data.main['language_supports']
+        data.parseLists(columns = ['audio_language_supports', 'subtitles_language_supports'], data_frames = ['language_supports', 'language_supports'], fields = ['language_1', 'language_2'], inplace = True)
+
+        with profiler.stage('removeNaFromLists'):
+            for column in ['audio_language_supports', 'subtitles_language_supports']:
+                data.main[column] = data.main[column].apply(removeNaFromLists).apply(removeEmptyLists)
+
+        data.parseLists(columns = ['audio_language_supports', 'subtitles_language_supports'], data_frames = ['languages', 'languages'], fields = ['name', 'name'], inplace = True)
+
+    def dates(data):
+        data.parseDates(column = 'first_release_date', inplace = True)
+
+    def names(data):
+        data.parseLists(columns = ['game_engines'], data_frames = ['game_engines'], fields = ['name'], inplace = True)
+        data.parseLists(columns = ['genres'], data_frames = ['genres'], fields = ['name'], inplace = True)
+
+        with profiler.stage('categories'):
+            data.main['category'] = data.main['category'].replace(CATEGORIES)
+
+    def select(data):
+        return data.main[['id', 'name', 'game_engines', 'genres', 'category', 'audio_language_supports', 'subtitles_language_supports', 'month_release', 'year_release']]
+
+    return [columns, languages, dates, names, select]
+
+def _notebookPipeline(tables):
+    data = _notebookData(tables)
+    for step in _notebookSteps():
+        result = step(data)
+        if isinstance(result, pd.DataFrame):
+            data.main = result
+    return data.main
+
+def benchExtract(games = 5000, latency = 1.0, workers = 8):
+    """
+    Compara el bucle secuencial de Data.extract con el modo concurrente contra un servidor IGDB local.
+    La latencia por defecto imita una página de 500 juegos con fields *.
+    """
+
+    with MockIGDB(tables = fakeIGDBTables(games = games), latency = latency) as server:
+        data = Data('mock', 'mock', base_url = server.base_url, auth_url = server.auth_url)
+
+        _, serial = _timeit(data.extract, endpoints = ['games'], batches = 10000, show_logs = False)
+        serialRows = len(data.main)
+
+        _, concurrent = _timeit(data.extract, endpoints = ['games'], batches = 10000, show_logs = False, workers = workers)
+        concurrentRows = len(data.main)
+
+    print(f'[extract] serial     : {serial:.2f}s ({serialRows} rows)')
+    print(f'[extract] workers={workers}  : {concurrent:.2f}s ({concurrentRows} rows) | speedup x{serial / concurrent:.2f}')
+
+def benchMultiquery(games = 5000, latency = 0.5):
+    """
+    Compara la extracción de todos los endpoints del notebook uno a uno con la extracción a través de /multiquery.
+    """
+
+    endpoints = ['games', 'game_engines', 'language_supports', 'languages', 'genres']
+
+    with MockIGDB(tables = fakeIGDBTables(games = games), latency = latency) as server:
+        data = Data('mock', 'mock', base_url = server.base_url, auth_url = server.auth_url)
+
+        requests_ = server.requests
+        _, serial = _timeit(data.extract, endpoints = endpoints, batches = 10000, show_logs = False)
+        serialRequests = server.requests - requests_
+        reference = {endpoint : data[endpoint] for endpoint in endpoints[1:]}
+
+        requests_ = server.requests
+        _, multiquery = _timeit(data.extract, endpoints = endpoints, batches = 10000, show_logs = False, multiquery = True)
+        multiqueryRequests = server.requests - requests_
+
+    assert all(reference[endpoint].equals(data[endpoint]) for endpoint in reference)
+    print(f'[multiquery] one by one {serial:.2f}s ({serialRequests} requests) | multiquery {multiquery:.2f}s ({multiqueryRequests} requests) | speedup x{serial / multiquery:.2f}')
+
+def benchProjection(games = 5000, latency = 0.5, workers = 4):
+    """
+    Compara el flujo del notebook (extraer todo con fields '*', filterColumns y resolver los id's de motores y géneros
+    con sus tablas) con pedir solo esas columnas y expandir los nombres en el servidor con Data.projection.
+    """
+
+    endpoints = ['games', 'game_engines', 'language_supports', 'languages', 'genres']
+    columns = ['id', 'name', 'language_supports', 'game_engines', 'first_release_date', 'genres', 'category']
+    plan = {'game_engines' : [('game_engines', 'id', 'name')], 'genres' : [('genres', 'id', 'name')]}
+
+    with MockIGDB(tables = fakeIGDBTables(games = games), latency = latency) as server:
+        data = Data('mock', 'mock', base_url = server.base_url, auth_url = server.auth_url)
+
+        def full():
+            data.extract(endpoints = endpoints, batches = 10000, show_logs = False, workers = workers)
+            data.filterColumns(columns = columns, inplace = True)
+            data.resolve(plan, inplace = True)
+            return data.main
+
+        def projected():
+            fields, remaining = data.projection(columns, plan)
+            data.extract(endpoints = list(fields), fields = fields, batches = 10000, show_logs = False, workers = workers)
+            data.resolve(remaining, inplace = True)
+            return data.main
+
+        requests_ = server.requests
+        reference, old = _timeit(full)
+        fullRequests = server.requests - requests_
+
+        requests_ = server.requests
+        result, new = _timeit(projected)
+        projectedRequests = server.requests - requests_
+
+    pd.testing.assert_frame_equal(result, reference)
+    print(f'[projection] fields * + resolve {old:.2f}s ({fullRequests} requests) | projection {new:.2f}s ({projectedRequests} requests) | speedup x{old / new:.2f}')
+
+def benchDecode(games = 100000, batchSize = 500):
+    """
+    Micro-benchmark del camino página -> DataFrame de la extracción sobre páginas de 'fields *' grabadas del servidor
+    IGDB local (bytes de la respuesta). Compara json + lista de diccionarios + pd.DataFrame al final con
+    network.decodeJSON + storage.FrameBuilder (un DataFrame por página). Mide tiempo y pico de memoria (tracemalloc).
+    """
+
+    with MockIGDB(tables = fakeIGDBTables(games = games, wide = True)) as server:
+        pages = [json.dumps(server.query('games', f'fields *; limit {batchSize}; offset {offset};')).encode() for offset in range(0, games, batchSize)]
+
+    def listOfDicts():
+        data = []
+        for page in pages:
+            data.extend(json.loads(page))
+        return pd.DataFrame(data)
+
+    def builder():
+        data = FrameBuilder()
+        for page in pages:
+            data.append(decodeJSON(page))
+        return data.frame()
+
+    results = {}
+    for func in [listOfDicts, builder]:
+        gc.collect()
+        result, elapsed = _timeit(func)
+
+        gc.collect()
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        results[func.__name__] = (result, elapsed, peak)
+
+    (reference, old, oldPeak), (result, new, newPeak) = results.values()
+    pd.testing.assert_frame_equal(result, reference)
+    print(f'[decode] json + list + DataFrame {old:.2f}s (peak {oldPeak / 2**20:.0f} MiB) | decodeJSON + FrameBuilder {new:.2f}s (peak {newPeak / 2**20:.0f} MiB) | speedup x{old / new:.2f} ({len(pages)} pages, {sum(map(len, pages)) / 2**20:.1f} MiB of JSON)')
+
+def benchStorage(games = 200000):
+    """
+    Compara tamaño en disco y tiempo de carga del csv (más el ast.literal_eval de las listas que hace falta
+    después) frente a parquet y feather, leyendo todo o solo las columnas del notebook.
+    """
+
+    df = pd.DataFrame(fakeIGDBTables(games = games)['games'])
+    lists = ['genres', 'game_engines', 'language_supports']
+    columns = ['id', 'name', 'language_supports', 'game_engines', 'first_release_date', 'genres', 'category']
+
+    with tempfile.TemporaryDirectory() as directory:
+        for format in ['csv', 'parquet', 'feather']:
+            path = os.path.join(directory, f'games_data.{format}')
+            _, save = _timeit(saveFrame, df, path)
+
+            def load(columns = None):
+                loaded = loadFrame(path, columns = columns)
+                if format == 'csv':
+                    for column in lists:
+                        loaded[column] = loaded[column].apply(lambda x : ast.literal_eval(x) if isinstance(x, str) else x)
+                return loaded
+
+            _, full = _timeit(load)
+            _, projected = _timeit(load, columns)
+
+            print(f'[storage] {format:8} | size {os.path.getsize(path) / 2**20:7.2f} MiB | save {save:.2f}s | load+parse {full:.2f}s | load+parse 7 columns {projected:.2f}s')
+
+def _originalReplaceIds(main_df, main_column, foreign_df, foreign_column, accessColumn):
+    #[Data._replaceIds] y [Data._getIdFieldDict] tal como estaban antes de vectorizarlos, como referencia
+    df = main_df
+
+    id_field_dict = foreign_df.set_index(accessColumn)[foreign_column].to_dict()
+
+    def replace(ids):
+        def toInt(content):
+            try:
+                return int(content)
+            except ValueError:
+                return content
+
+        if isinstance(ids, (list, np.ndarray)):
+            return [id_field_dict.get(toInt(id_), np.nan) for id_ in ids]
+        elif ids is np.NaN:
+            return ids
+        return id_field_dict.get(toInt(ids), np.nan)
+
+    def parseStr(s):
+        if pd.isna(s):
+            return s
+
+        try:
+            return ast.literal_eval(s)
+        except (ValueError, SyntaxError, TypeError):
+            pass
+
+        try:
+            return int(s)
+        except ValueError:
+            pass
+
+        try:
+            return float(s)
+        except ValueError:
+            pass
+
+        return s
+
+    if all(isinstance(element, str) for element in df[main_column].dropna()):
+        df[main_column] = df[main_column].apply(parseStr)
+
+    df[main_column] = df[main_column].apply(replace)
+
+def benchResolve(games = 300000):
+    """
+    Compara la resolución de id's a nombres de Data.parseLists con el código original (_replaceIds con su apply
+    fila a fila), sobre columnas de listas (géneros y motores, este con muchos np.nan) y sobre las listas como
+    texto, como quedan al leer un csv.
+    """
+
+    tables = fakeIGDBTables(games = games)
+    main = pd.DataFrame(tables['games'])
+    main['genres_csv'] = main['genres'].apply(lambda x : str(x) if isinstance(x, list) else x)
+
+    data = Data('mock', 'mock')
+    data.dataframes = {'genres' : pd.DataFrame(tables['genres']), 'game_engines' : pd.DataFrame(tables['game_engines'])}
+
+    for column, table in [('genres', 'genres'), ('game_engines', 'game_engines'), ('genres_csv', 'genres')]:
+        reference = main[[column]].copy()
+        _, old = _timeit(_originalReplaceIds, reference, column, data.dataframes[table], 'name', 'id')
+
+        data.main = main[[column]].copy()
+        _, new = _timeit(data.parseLists, columns = [column], data_frames = [table], fields = ['name'], inplace = True)
+
+        pd.testing.assert_series_equal(data.main[column], reference[column])
+        print(f'[resolve] {column:12} | original apply {old:.2f}s | vectorized {new:.2f}s | speedup x{old / new:.1f} ({games} games)')
+
+def benchResolvePlan(games = 100000):
+    """
+    Compara las llamadas encadenadas a Data.parseLists del notebook (idiomas, motores y géneros) con el mismo
+    plan de Data.resolve en serie y en paralelo, con las listas ya parseadas y como texto (leídas de un csv).
+    """
+
+    tables = fakeIGDBTables(games = games)
+    columns = ['audio_language_supports', 'subtitles_language_supports', 'game_engines', 'genres']
+    plan = {'audio_language_supports' : {'source' : 'language_supports', 'steps' : [('language_supports', 'id', 'language_1'), ('languages', 'id', 'name')], 'dropna' : True},
+            'subtitles_language_supports' : {'source' : 'language_supports', 'steps' : [('language_supports', 'id', 'language_2'), ('languages', 'id', 'name')], 'dropna' : True},
+            'game_engines' : [('game_engines', 'id', 'name')],
+            'genres' : [('genres', 'id', 'name')]}
+
+    def chained(data):
+        for step in _notebookSteps()[:2]:
+            step(data)
+        data.parseLists(columns = ['game_engines'], data_frames = ['game_engines'], fields = ['name'], inplace = True)
+        data.parseLists(columns = ['genres'], data_frames = ['genres'], fields = ['name'], inplace = True)
+        return data.main[columns]
+
+    for source in ['lists', 'csv']:
+        data = _notebookData(tables)
+        if source == 'csv':
+            for column in ['language_supports', 'game_engines', 'genres']:
+                data.main[column] = data.main[column].apply(lambda x : str(x) if isinstance(x, list) else x)
+        main = data.main
+
+        data.main = main.copy()
+        reference, old = _timeit(chained, data)
+        data.main = main.copy()
+        _, serial = _timeit(data.resolve, plan, inplace = True)
+        pd.testing.assert_frame_equal(data.main[columns], reference)
+        data.main = main.copy()
+        _, parallel = _timeit(data.resolve, plan, inplace = True, parallel = True)
+        pd.testing.assert_frame_equal(data.main[columns], reference)
+
+        print(f'[resolve-plan] {source:5} | parseLists chain {old:.2f}s | plan serial {serial:.2f}s (x{old / serial:.1f}) | plan parallel {parallel:.2f}s (x{old / parallel:.1f}) ({games} games)')
+
+def benchParse(games = 300000):
+    """
+    Compara el parseo celda a celda con ast.literal_eval de las listas leídas de un csv con util.parseStrColumn.
+    """
+
+    main = pd.DataFrame(fakeIGDBTables(games = games)['games'])
+    column = main['genres'].astype(str)
+
+    reference, old = _timeit(column.apply, parseStr)
+    parsed, new = _timeit(parseStrColumn, column)
+
+    assert parsed.equals(reference)
+    print(f'[parse] literal_eval {old:.2f}s | parseStrColumn {new:.2f}s | speedup x{old / new:.2f} ({games} rows)')
+
+def benchAirtable(rows = 1000, latency = 0.5, workers = 5):
+    """
+    Compara util.loadToAirtable enviando los batches de uno en uno con el envío concurrente contra un servidor Airtable local.
+    Con la latencia real de Airtable el envío secuencial no llega a las 5 requests por segundo que permite la API.
+    """
+
+    df = pd.DataFrame(fakeIGDBTables(games = rows)['games'])
+
+    with MockAirtable(latency = latency) as server:
+        _, serial = _timeit(loadToAirtable, 'mock', 'app', ['serial'], df, workers = 1, show_logs = False, base_url = server.base_url)
+        _, concurrent = _timeit(loadToAirtable, 'mock', 'app', ['concurrent'], df, workers = workers, show_logs = False, base_url = server.base_url)
+
+        assert len(server.records('app', 'concurrent')) == rows
+        print(f'[airtable] serial {serial:.2f}s | workers={workers} {concurrent:.2f}s | speedup x{serial / concurrent:.2f} | 429 {server.rejected} ({rows} rows)')
+
+def benchAirtableExtract(rows = 40000, tables = 4, latency = 0.05):
+    """
+    Compara la descarga de Airtable anterior (tablas una a una y pd.concat tras cada página de 100 records)
+    con util.extractFromAirtable. El servidor local no limita las requests para medir solo el cliente.
+    """
+
+    df = pd.DataFrame(fakeIGDBTables(games = rows)['games']).fillna('').astype(str)
+    tbls = [f'table_{i}' for i in range(tables)]
+
+    with MockAirtable(latency = latency, rate_limit = 10**6, max_concurrent = 64) as server:
+        for tbl, chunk in zip(tbls, np.array_split(np.arange(rows), tables)):
+            server.create('app', tbl, [{'fields' : fields} for fields in df.iloc[chunk].to_dict('records')])
+
+        #Implementación anterior de extractTbl / extractFromAirtable como referencia
+        def concatExtract():
+            df_airtable = pd.DataFrame()
+            for tbl in tbls:
+                params = {'offset' : None}
+                df_tbl = pd.DataFrame()
+                while params.get('offset') is not None or df_tbl.shape[0] == 0:
+                    response = requests.get(f'{server.base_url}/app/{tbl}', params = params)
+                    params['offset'] = response.json().get('offset')
+                    df_tbl = pd.concat([df_tbl, pd.json_normalize(response.json()['records'])], ignore_index = True)
+                df_airtable = pd.concat([df_airtable, df_tbl], ignore_index = True)
+            df_airtable = df_airtable[df_airtable.columns[2:]]
+            df_airtable = df_airtable.rename(columns = {x : x.split('.')[1] for x in df_airtable.columns})
+            for column in df_airtable.columns:
+                df_airtable[column] = df_airtable[column].apply(parseStr)
+            return df_airtable.replace('nan', np.nan)
+
+        reference, old = _timeit(concatExtract)
+        result, new = _timeit(extractFromAirtable, 'mock', 'app', tbls, rate_limit = 10**6, base_url = server.base_url)
+
+    pd.testing.assert_frame_equal(result, reference)
+    print(f'[airtable-extract] concat {old:.2f}s | extractFromAirtable {new:.2f}s | speedup x{old / new:.2f} ({rows} rows, {tables} tables)')
+
+def benchCache(games = 5000, rows = 5000, latency = 0.5, workers = 4):
+    """
+    Compara una extracción de IGDB y Airtable sin caché, con la caché recién llenada y en modo offline
+    (con los servidores ya parados).
+    """
+
+    df = pd.DataFrame(fakeIGDBTables(games = rows)['games']).fillna('').astype(str)
+
+    with tempfile.TemporaryDirectory() as directory:
+        client = HttpClient(cache = ResponseCache(directory))
+
+        def run(igdb, airtable):
+            data = Data('mock', 'mock', base_url = igdb.base_url, auth_url = igdb.auth_url, client = client)
+            data.extract(endpoints = ['games'], batches = 10000, show_logs = False, workers = workers)
+            return data.main, extractFromAirtable('mock', 'app', ['games'], base_url = airtable.base_url, client = client)
+
+        with MockIGDB(tables = fakeIGDBTables(games = games), latency = latency) as igdb, MockAirtable(latency = latency) as airtable:
+            airtable.create('app', 'games', [{'fields' : fields} for fields in df.to_dict('records')])
+
+            reference, cold = _timeit(run, igdb, airtable)
+            result, warm = _timeit(run, igdb, airtable)
+
+        client.cache.offline = True
+        offlineResult, offline = _timeit(run, igdb, airtable)
+
+    for frames in [result, offlineResult]:
+        for frame, expected in zip(frames, reference):
+            pd.testing.assert_frame_equal(frame, expected)
+
+    print(f'[cache] cold {cold:.2f}s | warm {warm:.2f}s (x{cold / warm:.1f}) | offline {offline:.2f}s (x{cold / offline:.1f}) | {client.cache.size / 2**20:.1f} MiB on disk')
+
+def benchProfile(games = 20000, cprofile = None, directory = 'profiles'):
+    """
+    Ejecuta las transformaciones del notebook y las gráficas con el perfilado activo, imprime el informe por etapa
+    (tiempo real, CPU y pico de memoria), lo guarda en [directory] y lo compara con el informe anterior si lo hay.
+    """
+
+    tables = fakeIGDBTables(games = games)
+    previous = sorted(glob.glob(os.path.join(directory, 'profile_*.json')))
+
+    profiler.reset()
+    profiler.enable(memory = True, cprofile = cprofile, directory = directory)
+    try:
+        with profiler.stage('pipeline'):
+            dataframe = _notebookPipeline(tables)
+            for figure in [languages_fig, releases_fig, engines_fig, engines_years_fig, genres_categories_fig]:
+                figure(dataframe)
+    finally:
+        profiler.disable()
+
+    print(f'[profile] {games} games\n{profiler.report().to_string()}')
+    print(f'[profile] report written to {profiler.write()}')
+    if previous:
+        print(f'[profile] compared with {previous[-1]}\n{profiler.compare(previous[-1]).to_string()}')
+
+def benchChunks(games = 200000, chunk_size = 20000):
+    """
+    Compara el pico de memoria (tracemalloc) y el tiempo de las transformaciones del notebook sobre la tabla de juegos
+    entera (loadFrame, pasos y saveFrame) con Data.transformChunks leyendo y escribiendo parquet por bloques.
+    """
+
+    tables = fakeIGDBTables(games = games)
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, 'games_data.parquet')
+        saveFrame(pd.DataFrame(tables.pop('games')), source)
+        fullPath, chunksPath = os.path.join(directory, 'full.parquet'), os.path.join(directory, 'chunks.parquet')
+
+        def full():
+            data = _notebookData(tables, main = False)
+            data.main = loadFrame(source)
+            for step in _notebookSteps():
+                result = step(data)
+                if isinstance(result, pd.DataFrame):
+                    data.main = result
+            saveFrame(data.main, fullPath)
+
+        def chunked():
+            data = _notebookData(tables, main = False)
+            data.transformChunks(source, _notebookSteps(), output = chunksPath, chunk_size = chunk_size, show_logs = False)
+
+        results = {}
+        tracemalloc.start()
+        try:
+            for name, run in [('full', full), ('chunks', chunked)]:
+                gc.collect()
+                current, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+                _, seconds = _timeit(run)
+                results[name] = (seconds, tracemalloc.get_traced_memory()[1] - current)
+        finally:
+            tracemalloc.stop()
+
+        pd.testing.assert_frame_equal(loadFrame(chunksPath), loadFrame(fullPath))
+
+    (old, oldPeak), (new, newPeak) = results['full'], results['chunks']
+    print(f'[chunks] full table {old:.2f}s (peak {oldPeak / 2**20:.0f} MiB) | {chunk_size}-row chunks {new:.2f}s (peak {newPeak / 2**20:.0f} MiB) | memory x{oldPeak / newPeak:.1f} less ({games} games)')
+
+def benchProcesses(games = 200000, chunk_size = 20000):
+    """
+    Escalado de Data.transformChunks con las transformaciones del notebook según el número de procesos
+    (1, 2, 4... hasta el número de núcleos), comprobando que el resultado es el mismo que con uno.
+    """
+
+    tables = fakeIGDBTables(games = games)
+    cores = os.cpu_count()
+    counts = [1] + [2**i for i in range(1, max(cores, 2).bit_length()) if 2**i <= max(cores, 2)]
+    counts += [cores] if cores not in counts else []
+
+    reference, times = None, {}
+    for processes in counts:
+        data = _notebookData(tables)
+        _, times[processes] = _timeit(data.transformChunks, None, _notebookSteps(), chunk_size = chunk_size, processes = processes, show_logs = False)
+        if reference is None:
+            reference = data.main
+        else:
+            pd.testing.assert_frame_equal(data.main, reference)
+
+    print(f'[processes] {games} games in {chunk_size}-row chunks, {cores} cores | ' + ' | '.join(f'{processes}: {seconds:.2f}s (x{times[1] / seconds:.2f})' for processes, seconds in times.items()))
+
+def benchDates(games = 1000000):
+    """
+    Compara los tres apply fila a fila del notebook (fromtimestamp + strftime y los cortes de mes y año) con
+    Data.parseDates, y el paso a etiquetas de mes de releases_fig con strptime frente a cube.MONTHS.
+    """
+
+    rng = np.random.default_rng(0)
+    timestamps = pd.Series(rng.integers(315532800, 1704067200, games), dtype = float)
+    timestamps[rng.random(games) < 0.1] = np.nan
+    main = pd.DataFrame({'first_release_date' : timestamps})
+
+    def applyDates(df):
+        df['first_release_date'] = df['first_release_date'].apply(lambda x : datetime.utcfromtimestamp(x).strftime('%m-%d-%Y') if not pd.isna(x) else np.nan)
+        df['month_release'] = df['first_release_date'].apply(lambda x : x[:2] if not pd.isna(x) else np.nan)
+        df['year_release'] = df['first_release_date'].apply(lambda x : x[-4:] if not pd.isna(x) else np.nan)
+        return df
+
+    data = Data('mock', 'mock')
+    data.main = main
+
+    reference, old = _timeit(applyDates, main.copy())
+    parsed, new = _timeit(data.parseDates)
+
+    assert parsed['first_release_date'].equals(reference['first_release_date'])
+    for column in ['month_release', 'year_release']:
+        assert parsed[column].equals(pd.to_numeric(reference[column]).astype(parsed[column].dtype))
+
+    months = pd.Series(rng.integers(1, 13, games))
+    labels, oldLabels = _timeit(months.apply, lambda x : datetime.strptime(f'{x}', '%m').strftime('%b'))
+    mapped, newLabels = _timeit(lambda : np.array(MONTHS, dtype = object)[months.to_numpy() - 1])
+    assert labels.tolist() == mapped.tolist()
+
+    print(f'[dates] apply {old:.2f}s -> parseDates {new:.2f}s (x{old / new:.1f}) | month labels strptime {oldLabels:.2f}s -> MONTHS {newLabels:.3f}s ({games} rows)')
+
+def _figureFrame(games, seed = 0):
+    #Juegos ya procesados (como los de Airtable) generados con numpy. Los motores y géneros siguen una distribución
+    #sesgada, como en IGDB, donde unos pocos motores acumulan la mayoría de los juegos.
+    rng = np.random.default_rng(seed)
+
+    def lists(names, share, maxLength):
+        weights = 1 / np.arange(1, len(names) + 1) ** 1.1
+        picks = rng.choice(len(names), size = (games, maxLength), p = weights / weights.sum())
+        lengths = np.where(rng.random(games) < share, rng.integers(1, maxLength + 1, games), 0)
+        return [[names[pick] for pick in dict.fromkeys(row[:length])] if length else np.nan for row, length in zip(picks.tolist(), lengths.tolist())]
+
+    years = rng.integers(1980, 2024, games).astype(str).astype(object)
+    months = np.char.zfill(rng.integers(1, 13, games).astype(str), 2).astype(object)
+    undated = rng.random(games) < 0.1
+    years[undated] = np.nan
+    months[undated] = np.nan
+
+    categories = np.array(list(CATEGORIES.values()), dtype = object)
+    return pd.DataFrame({'game_engines' : lists([f'Engine {i}' for i in range(1, 401)], 0.3, 2),
+                         'genres' : lists([f'Genre {i}' for i in range(1, 24)], 0.95, 3),
+                         'category' : categories[rng.choice([0, 0, 0, 0, 1, 2, 3, 4, 5, 8, 9, 11], games)],
+                         'year_release' : years,
+                         'month_release' : months})
+
+def _figurePoints(figure):
+    #Puntos de cada traza, sin depender del orden de las trazas ni de los empates al ordenar
+    points = []
+    for trace in figure.to_dict()['data']:
+        columns = [list(map(str, trace[key])) for key in ('x', 'y', 'ids', 'values', 'labels', 'parents') if key in trace]
+        points.append((trace.get('name', ''), sorted(zip(*columns))))
+    return sorted(points)
+
+def benchFigures(games = 1000000):
+    """
+    Compara engines_years_fig y genres_categories_fig anteriores (un diccionario por año o categoría, recorriendo
+    todos los juegos dentro del bucle) con las versiones sobre cube.AggregateCube (explode una vez, matriz de una
+    pasada y nlargest) en un DataFrame sintético. Las gráficas tienen que tener los mismos puntos.
+    """
+
+    dataframe = _figureFrame(games)
+
+    #Implementaciones anteriores como referencia
+    def loopEnginesYears(dataframe):
+        engines_years_df = dataframe[['game_engines', 'year_release']].dropna()
+        engines_only = pd.DataFrame([engine for engines in dataframe['game_engines'] if isinstance(engines, list) for engine in engines], columns = ['game_engines'])
+        engine_counts_df = pd.DataFrame(engines_only.value_counts()).reset_index()
+        top10 = list(engine_counts_df.sort_values('count', ascending = False).head(10)['game_engines'])
+
+        engines_year_dict = {year : [] for year in engines_years_df['year_release']}
+        for engines, year in zip(engines_years_df['game_engines'], engines_years_df['year_release']):
+            engines_year_dict[year].extend(engines)
+
+        for year, engines in engines_year_dict.items():
+            engines_ = []
+            for engine in dataframe['game_engines']:
+                if isinstance(engine, (list, np.ndarray)):
+                    engines_.extend(engine)
+            engines_dict = {engine : 0 for engine in set(engines_)}
+            for engine in engines:
+                engines_dict[engine] = engines_dict[engine] + 1
+            engines_year_dict[year] = engines_dict
+
+        df_melt = pd.DataFrame(engines_year_dict).reset_index().melt(id_vars = 'index', var_name = 'Year', value_name = 'Value').rename(columns = {'index' : 'Engine'})
+        df_melt = df_melt[df_melt['Engine'].isin(top10)]
+        return px.line(data_frame = df_melt.sort_values(['Year', 'Value'], ascending = True), x = 'Year', y = 'Value', color = 'Engine')
+
+    def loopGenresCategories(dataframe):
+        genres_categories_df = dataframe[['genres', 'category']].dropna()
+
+        genres_categories_dict = {category : [] for category in genres_categories_df['category']}
+        for genres, category in zip(genres_categories_df['genres'], genres_categories_df['category']):
+            genres_categories_dict[category].extend(genres)
+
+        for category, genres in genres_categories_dict.items():
+            genres_ = []
+            for genre in dataframe['genres']:
+                if isinstance(genre, (list, np.ndarray)):
+                    genres_.extend(genre)
+            genres_dict = {genre : 0 for genre in set(genres_)}
+            for genre in genres:
+                genres_dict[genre] = genres_dict[genre] + 1
+            genres_categories_dict[category] = genres_dict
+        del genres_categories_dict['main_game']
+
+        df_melt = pd.DataFrame(genres_categories_dict).reset_index().melt(id_vars = 'index', var_name = 'category', value_name = 'value').rename(columns = {'index' : 'genre'})
+        return px.treemap(data_frame = df_melt, values = 'value', path = ['genre', 'category'], color = 'genre', color_continuous_scale = 'green')
+
+    oldYears, loopYears = _timeit(loopEnginesYears, dataframe)
+    oldGenres, loopGenres = _timeit(loopGenresCategories, dataframe)
+
+    cube, build = _timeit(AggregateCube.fromFrame, dataframe, dimensions = ['game_engines', 'genres'])
+    newYears, cubeYears = _timeit(engines_years_fig, cube)
+    newGenres, cubeGenres = _timeit(genres_categories_fig, cube)
+
+    assert _figurePoints(newYears) == _figurePoints(oldYears)
+    assert _figurePoints(newGenres) == _figurePoints(oldGenres)
+
+    old, new = loopYears + loopGenres, build + cubeYears + cubeGenres
+    print(f'[figures] engines_years_fig loop {loopYears:.2f}s -> cube {cubeYears:.2f}s | genres_categories_fig loop {loopGenres:.2f}s -> cube {cubeGenres:.2f}s')
+    print(f'[figures] both figures {old:.2f}s -> {new:.2f}s including the cube ({build:.2f}s) | speedup x{old / new:.1f} ({games} games)')
+
+BENCHMARKS = {'extract' : benchExtract,
+              'multiquery' : benchMultiquery,
+              'projection' : benchProjection,
+              'decode' : benchDecode,
+              'storage' : benchStorage,
+              'resolve' : benchResolve,
+              'resolve-plan' : benchResolvePlan,
+              'parse' : benchParse,
+              'airtable' : benchAirtable,
+              'airtable-extract' : benchAirtableExtract,
+              'cache' : benchCache,
+              'profile' : benchProfile,
+              'figures' : benchFigures,
+              'chunks' : benchChunks,
+              'processes' : benchProcesses,
+              'dates' : benchDates}
+
+if __name__ == '__main__':
+    for name in sys.argv[1:] or BENCHMARKS:
+        BENCHMARKS[name]()
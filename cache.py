@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import struct
+import threading
+import zlib
+
+from time import time
+
+class CacheMiss(LookupError):
+    pass
+
+class ResponseCache:
+
+    #Constructor
+    def __init__(self, directory = '.http_cache', ttl = 24 * 60 * 60, max_size = 2**30, offline = False, level = 6):
+        """
+
+        PUBLIC METHOD
+
+
+        directory (str): Carpeta donde se guardan las respuestas.
+
+        ttl (float): Segundos que una respuesta se considera válida. None para que no caduquen.
+
+        max_size (int): Bytes máximos en disco. Al superarlos se borran las respuestas usadas hace más tiempo (LRU).
+
+        offline (bool): Modo sin conexión: se sirven todas las respuestas guardadas aunque hayan caducado y, si una
+                        request no está guardada, se lanza CacheMiss en lugar de enviarla.
+
+        level (int): Nivel de compresión zlib de las respuestas.
+
+        Caché en disco de respuestas HTTP, indexada por (método, url, parámetros, cuerpo). Se activa pasándola a
+        network.HttpClient, que solo guarda las respuestas 200 de las requests de lectura (GET y queries de IGDB):
+
+            client = HttpClient(cache = ResponseCache())
+            data = Data(clientID, clientSecret, client = client)
+            dataframe = extractFromAirtable(key, app, tbls, client = client)
+        """
+
+        self.directory = directory
+        self.ttl = ttl
+        self.max_size = max_size
+        self.offline = offline
+        self.level = level
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok = True)
+        self._size = sum(os.path.getsize(path) for path in self._entries())
+
+    @staticmethod
+    def key(method, url, params = None, data = None, json_ = None):
+        """
+
+        PUBLIC METHOD
+
+
+        Clave de una request. Las cabeceras no forman parte de la clave (el token cambia entre ejecuciones).
+        """
+
+        if isinstance(data, bytes):
+            data = data.decode()
+        content = json.dumps([method.upper(), url, sorted((params or {}).items()), data, json_], sort_keys = True, default = str)
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def get(self, key):
+        """
+
+        PUBLIC METHOD
+
+
+        Devuelve el cuerpo guardado de [key], o None si no está o ha caducado (en modo offline nunca caduca).
+        """
+
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as file:
+                created, = struct.unpack('d', file.read(8))
+                content = file.read()
+        except FileNotFoundError:
+            self._count(hit = False)
+            return None
+
+        if not self.offline and self.ttl is not None and time() - created > self.ttl:
+            self._count(hit = False)
+            return None
+
+        #La fecha de modificación marca el último uso para el LRU
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+
+        self._count(hit = True)
+        return zlib.decompress(content)
+
+    def put(self, key, content):
+        """
+
+        PUBLIC METHOD
+
+
+        Guarda el cuerpo [content] (bytes) de forma atómica y, si hace falta, libera espacio.
+        """
+
+        path = self._path(key)
+        compressed = struct.pack('d', time()) + zlib.compress(content, self.level)
+
+        with open(f'{path}.tmp', 'wb') as file:
+            file.write(compressed)
+
+        with self._lock:
+            previous = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(f'{path}.tmp', path)
+            self._size += len(compressed) - previous
+
+            if self._size > self.max_size:
+                self._evict()
+
+    def clear(self):
+        """
+
+        PUBLIC METHOD
+
+
+        Borra todas las respuestas guardadas.
+        """
+
+        with self._lock:
+            for path in self._entries():
+                os.remove(path)
+            self._size = 0
+
+    @property
+    def size(self):
+        return self._size
+
+    def _evict(self):
+        #Se borran las entradas menos usadas hasta quedar por debajo del 90% del máximo
+        entries = sorted(self._entries(), key = os.path.getmtime)
+        for path in entries:
+            if self._size <= 0.9 * self.max_size:
+                break
+            self._size -= os.path.getsize(path)
+            os.remove(path)
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.z')
+
+    def _entries(self):
+        return [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith('.z')]
@@ -0,0 +1,256 @@
+import itertools
+import numpy as np
+import pandas as pd
+
+from util import _pausedGC
+
+def _smallestInt(numbers):
+    #Tipo entero con pd.NA más pequeño que admite todos los valores de [numbers]
+    for dtype in ['Int8', 'Int16', 'Int32']:
+        info = np.iinfo(dtype.lower())
+        if not (numbers.min() < info.min or numbers.max() > info.max):
+            return dtype
+    return 'Int64'
+
+def _isListColumn(series):
+    #Basta con mirar el primer valor no nulo de las columnas object
+    if series.dtype != object:
+        return False
+    first = series.first_valid_index()
+    return first is not None and isinstance(series.loc[first], (list, np.ndarray))
+
+class ListColumn:
+
+    #Constructor
+    def __init__(self, codes, offsets, categories, valid, name = None):
+        """
+
+        PUBLIC METHOD
+
+
+        codes (np.ndarray<int32>): Código de cada elemento de todas las listas seguidas. -1 para np.nan.
+
+        offsets (np.ndarray<int64>): Inicio de la lista de cada fila en [codes] (n + 1 posiciones).
+
+        categories (pd.Index): Diccionario de valores distintos. codes[i] es la posición en categories.
+
+        valid (np.ndarray<bool>): False en las filas que no tienen lista (np.nan).
+
+        Columna de listas en formato CSR: en lugar de un objeto list por fila guarda un único array de códigos
+        enteros, los offsets de cada fila y el diccionario de categorías. Se crea con [fromSeries].
+        """
+
+        self.codes = codes
+        self.offsets = offsets
+        self.categories = categories
+        self.valid = valid
+        self.name = name
+
+    @classmethod
+    def fromSeries(cls, series):
+        """
+
+        PUBLIC METHOD
+
+
+        series (pd.Series): Columna con listas (o np.ndarray) y np.nan.
+
+        Convierte la columna a formato CSR.
+        """
+
+        cells = series.to_numpy(dtype = object)
+        valid = np.fromiter(map(isinstance, cells, itertools.repeat((list, np.ndarray))), dtype = bool, count = len(cells))
+
+        lengths = np.zeros(len(cells), dtype = np.int64)
+        lengths[valid] = np.fromiter(map(len, cells[valid]), dtype = np.int64, count = int(valid.sum()))
+
+        offsets = np.zeros(len(cells) + 1, dtype = np.int64)
+        np.cumsum(lengths, out = offsets[1:])
+
+        flat = np.empty(int(offsets[-1]), dtype = object)
+        flat[:] = list(itertools.chain.from_iterable(cells[valid]))
+
+        codes, uniques = pd.factorize(flat)
+        return cls(codes.astype(np.int32), offsets, pd.Index(uniques), valid, name = series.name)
+
+    def __len__(self):
+        return len(self.valid)
+
+    def __getitem__(self, row):
+        if not self.valid[row]:
+            return np.nan
+        codes = self.codes[self.offsets[row] : self.offsets[row + 1]]
+        return [self.categories[code] if code >= 0 else np.nan for code in codes]
+
+    @property
+    def lengths(self):
+        return np.diff(self.offsets)
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + self.offsets.nbytes + self.valid.nbytes + self.categories.memory_usage(deep = True)
+
+    def values(self):
+        """
+
+        PUBLIC METHOD
+
+
+        Devuelve todos los elementos de todas las listas seguidos (sin crear una lista por fila).
+        """
+
+        values = np.full(len(self.codes), np.nan, dtype = object)
+        found = self.codes >= 0
+        values[found] = self.categories.to_numpy(dtype = object)[self.codes[found]]
+        return values
+
+    def explode(self):
+        """
+
+        PUBLIC METHOD
+
+
+        Equivalente a pd.Series.explode sobre la columna original, pero sin filas para los np.nan
+        ni para las listas vacías. El índice es la posición de la fila.
+        """
+
+        rows = np.repeat(np.arange(len(self.valid)), self.lengths)
+        return pd.Series(self.values(), index = rows, name = self.name)
+
+    def counts(self):
+        """
+
+        PUBLIC METHOD
+
+
+        Número de apariciones de cada categoría, calculado directamente sobre los códigos.
+        """
+
+        counts = np.bincount(self.codes[self.codes >= 0], minlength = len(self.categories))
+        return pd.Series(counts, index = self.categories, name = 'count')
+
+    def toSeries(self, index = None):
+        """
+
+        PUBLIC METHOD
+
+
+        Reconstruye la columna con una lista de Python por fila. Solo hay que llamarlo cuando hagan falta las listas.
+        """
+
+        flat = self.values().tolist()
+        starts = self.offsets[:-1].tolist()
+        ends = self.offsets[1:].tolist()
+
+        with _pausedGC():
+            lists = [flat[start : end] if valid else np.nan for start, end, valid in zip(starts, ends, self.valid.tolist())]
+        return pd.Series(lists, index = index, name = self.name, dtype = object)
+
+class CompactFrame:
+
+    #Constructor
+    def __init__(self, frame, lists, columns):
+        """
+
+        PUBLIC METHOD
+
+
+        frame (pd.DataFrame): Columnas escalares ya compactadas.
+
+        lists (dict<str, ListColumn>): Columnas de listas en formato CSR.
+
+        columns (list<str>): Orden original de las columnas.
+
+        Versión compacta de un pd.DataFrame. Se crea con [fromFrame] o con Data.compact.
+        """
+
+        self.frame = frame
+        self.lists = lists
+        self.columns = columns
+
+    @classmethod
+    def fromFrame(cls, data_frame, list_columns = None, int_columns = ('month_release', 'year_release'), date_columns = ('first_release_date',), category_ratio = 0.5):
+        """
+
+        PUBLIC METHOD
+
+
+        data_frame (pd.DataFrame): DataFrame a compactar.
+
+        list_columns (list<str>): Columnas de listas. None para detectarlas (columnas object cuyo primer valor es una lista).
+
+        int_columns (list<str>): Columnas numéricas guardadas como texto ('01', '2019') que pasan al entero con pd.NA
+                                 más pequeño en el que caben (Int8 para los meses, Int16 para los años).
+
+        date_columns (list<str>): Columnas de fechas (texto 'mm-dd-YYYY' o timestamp en segundos) que pasan a datetime64.
+
+        category_ratio (float): Las columnas de texto con menos de este ratio de valores distintos pasan a 'category'.
+        """
+
+        if list_columns is None:
+            list_columns = [column for column in data_frame.columns if _isListColumn(data_frame[column])]
+
+        lists = {column : ListColumn.fromSeries(data_frame[column]) for column in list_columns}
+
+        frame = data_frame[[column for column in data_frame.columns if column not in lists]].copy()
+
+        for column in frame.columns:
+            series = frame[column]
+            if column in int_columns:
+                #Las que ya son enteros con pd.NA (Int8, Int16... de Data.parseDates) se dejan como están
+                if not (pd.api.types.is_extension_array_dtype(series) and pd.api.types.is_integer_dtype(series)):
+                    numbers = pd.to_numeric(series, errors = 'coerce')
+                    frame[column] = numbers.astype(_smallestInt(numbers))
+            elif column in date_columns:
+                if pd.api.types.is_numeric_dtype(series):
+                    frame[column] = pd.to_datetime(series, unit = 's')
+                else:
+                    frame[column] = pd.to_datetime(series, format = '%m-%d-%Y', errors = 'coerce')
+            elif series.dtype == object and series.nunique() < category_ratio * len(series):
+                frame[column] = series.astype('category')
+
+        return cls(frame, lists, list(data_frame.columns))
+
+    def __getitem__(self, column):
+        if column in self.lists:
+            return self.lists[column]
+        return self.frame[column]
+
+    def __len__(self):
+        return len(self.frame)
+
+    def toList(self, column):
+        """
+
+        PUBLIC METHOD
+
+
+        Devuelve la columna [column] como pd.Series de listas de Python.
+        """
+
+        return self.lists[column].toSeries(index = self.frame.index)
+
+    def toFrame(self):
+        """
+
+        PUBLIC METHOD
+
+
+        Reconstruye un pd.DataFrame con las listas como listas de Python, en el orden original de columnas.
+        """
+
+        df = self.frame.copy()
+        for column in self.lists:
+            df[column] = self.toList(column)
+        return df[self.columns]
+
+    def memory_usage(self):
+        """
+
+        PUBLIC METHOD
+
+
+        Bytes ocupados por las columnas escalares y por los arrays de las columnas de listas.
+        """
+
+        return int(self.frame.memory_usage(deep = True).sum() + sum(column.nbytes for column in self.lists.values()))
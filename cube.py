@@ -0,0 +1,208 @@
+import hashlib
+import os
+import pickle
+import numpy as np
+import pandas as pd
+
+from compact import ListColumn
+
+#Columnas de listas que se cuentan y columnas por las que se agrupan
+DIMENSIONS = ('game_engines', 'genres', 'audio_language_supports', 'subtitles_language_supports')
+KEYS = ('year_release', 'month_release', 'category')
+
+#Etiquetas de los meses 1-12 (month_release) en las gráficas
+MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+#Cambia si cambia el formato del cubo, para no leer cachés antiguas
+VERSION = 1
+
+class AggregateCube:
+
+    #Constructor
+    def __init__(self, rows, counts, keys):
+        """
+
+        PUBLIC METHOD
+
+
+        rows (pd.DataFrame): Una fila por combinación de [keys] (np.nan incluido) con el número de juegos ('rows')
+                             y, por cada columna de listas, el número de juegos que tienen lista ('{columna}_rows').
+
+        counts (dict<str, pd.DataFrame>): Por columna de listas, las apariciones de cada valor por combinación de
+                                          [keys]: columnas {columna}, *keys y 'count'. Los valores están en orden de
+                                          primera aparición y los np.nan de dentro de las listas no se cuentan.
+
+        keys (list<str>): Columnas de agrupación (año, mes, categoría).
+
+        Agregados de los juegos compartidos por todas las gráficas de [visualization]. Se calcula con una sola
+        pasada sobre los datos ([fromFrame]), explotando cada columna de listas una vez, y se puede guardar en
+        disco por la huella de los datos ([load]).
+        """
+
+        self.rows = rows
+        self.counts = counts
+        self.keys = keys
+
+    @classmethod
+    def fromFrame(cls, data_frame, dimensions = DIMENSIONS, keys = KEYS):
+        """
+
+        PUBLIC METHOD
+
+
+        data_frame (pd.DataFrame): Juegos ya procesados, como los que se cargan en Airtable.
+
+        dimensions (list<str>): Columnas de listas que se cuentan. Se ignoran las que no estén en [data_frame].
+
+        keys (list<str>): Columnas de agrupación. Se ignoran las que no estén en [data_frame].
+
+        Calcula el cubo.
+        """
+
+        dimensions = [column for column in dimensions if column in data_frame.columns]
+        keys = [column for column in keys if column in data_frame.columns]
+
+        #Grupo de cada fila, numerados por orden de aparición y con np.nan como un valor más
+        if keys:
+            groups = data_frame.groupby(keys, dropna = False, sort = False).ngroup().to_numpy()
+            table = data_frame[keys].drop_duplicates().reset_index(drop = True)
+        else:
+            groups = np.zeros(len(data_frame), dtype = np.int64)
+            table = pd.DataFrame(index = range(1 if len(data_frame) else 0))
+        size = len(table)
+
+        rows = table.copy()
+        rows['rows'] = np.bincount(groups, minlength = size)
+
+        counts = {}
+        for column in dimensions:
+            lists = ListColumn.fromSeries(data_frame[column])
+            rows[f'{column}_rows'] = np.bincount(groups[lists.valid], minlength = size)
+
+            #Cada elemento de cada lista con el grupo de su fila, codificado en un solo entero (valor, grupo)
+            elements = np.repeat(groups, lists.lengths)
+            found = lists.codes >= 0
+            pairs, pairCounts = np.unique(lists.codes[found].astype(np.int64) * size + elements[found], return_counts = True)
+
+            counted = table.iloc[pairs % size].reset_index(drop = True)
+            counted.insert(0, column, lists.categories.take(pairs // size))
+            counted['count'] = pairCounts
+            counts[column] = counted
+
+        return cls(rows, counts, keys)
+
+    @classmethod
+    def load(cls, data_frame, directory = '.cube_cache', dimensions = DIMENSIONS, keys = KEYS):
+        """
+
+        PUBLIC METHOD
+
+
+        directory (str): Carpeta de la caché.
+
+        Igual que [fromFrame], pero guarda el cubo en {directory}/{huella}.pkl y lo reutiliza mientras los datos
+        (las columnas usadas) no cambien. Calcular la huella cuesta bastante menos que el cubo.
+        """
+
+        columns = [column for column in [*dimensions, *keys] if column in data_frame.columns]
+        path = os.path.join(directory, f'{fingerprint(data_frame, columns)}.pkl')
+
+        if os.path.exists(path):
+            return pd.read_pickle(path)
+
+        cube = cls.fromFrame(data_frame, dimensions = dimensions, keys = keys)
+
+        os.makedirs(directory, exist_ok = True)
+        pd.to_pickle(cube, f'{path}.tmp')
+        os.replace(f'{path}.tmp', path)
+        return cube
+
+    def totals(self, column):
+        """
+
+        PUBLIC METHOD
+
+
+        Apariciones de cada valor de la columna de listas [column] en todos los juegos, en orden de primera aparición.
+        """
+
+        return self.counts[column].groupby(column, sort = False)['count'].sum()
+
+    def matrix(self, column, by, values = None):
+        """
+
+        PUBLIC METHOD
+
+
+        column (str): Columna de listas.
+
+        by (str): Columna de agrupación.
+
+        values (list): Valores de [column] que se quieren (por ejemplo los de [top]). None para todos.
+
+        Matriz valor x [by] con las apariciones de cada valor de [column] en los juegos de cada [by], contando solo los
+        juegos que tienen lista y [by]. Tiene todos los valores de [column] (0 donde no aparecen) y, como columnas,
+        los [by] que tienen algún juego con lista, ambos en orden de primera aparición. Se construye de una pasada
+        sobre los conteos del cubo: cada par (valor, by) se codifica en una celda y se suma con np.bincount.
+        """
+
+        counted = self.counts[column]
+        counted = counted[counted[by].notna()]
+
+        index = pd.Index(self.totals(column).index if values is None else values, name = column)
+        rows = self.rows[self.rows[by].notna() & (self.rows[f'{column}_rows'] > 0)]
+        columns = pd.Index(pd.unique(rows[by]), name = by)
+
+        valueCodes = index.get_indexer(counted[column])
+        found = valueCodes >= 0
+        cells = valueCodes[found] * len(columns) + columns.get_indexer(counted[by])[found]
+
+        matrix = np.bincount(cells, weights = counted['count'].to_numpy()[found], minlength = len(index) * len(columns))
+        return pd.DataFrame(matrix.reshape(len(index), len(columns)).astype(np.int64), index = index, columns = columns)
+
+    def top(self, column, n = 10):
+        """
+
+        PUBLIC METHOD
+
+
+        Los [n] valores de [column] con más apariciones (nlargest). Los empates se resuelven por orden de valor,
+        igual que ordenando el resultado de value_counts.
+        """
+
+        return self.totals(column).sort_index().nlargest(n)
+
+    def rowCounts(self, by):
+        """
+
+        PUBLIC METHOD
+
+
+        by (list<str>): Columnas de agrupación.
+
+        Número de juegos por cada combinación de [by], sin los np.nan y ordenado como un groupby.
+        """
+
+        return self.rows.groupby(by)['rows'].sum()
+
+def fingerprint(data_frame, columns = None):
+    """
+    Huella (blake2b) del contenido de las columnas [columns] de [data_frame]: número de filas, nombres y valores.
+    """
+
+    columns = list(data_frame.columns) if columns is None else columns
+    digest = hashlib.blake2b(repr((VERSION, len(data_frame), columns)).encode(), digest_size = 16)
+
+    for column in columns:
+        series = data_frame[column]
+        if series.dtype == object:
+            #Las listas no se pueden hashear con pandas, pickle las serializa de una pasada
+            digest.update(pickle.dumps(series.tolist(), protocol = pickle.HIGHEST_PROTOCOL))
+        else:
+            digest.update(str(series.dtype).encode())
+            digest.update(pd.util.hash_pandas_object(series, index = False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def aggregateCube(data_frame):
+    #Las gráficas aceptan el cubo o directamente el pd.DataFrame, y en ese caso lo calculan al momento
+    return data_frame if isinstance(data_frame, AggregateCube) else AggregateCube.fromFrame(data_frame)
@@ -1,31 +1,77 @@
 import numpy as np
 import pandas as pd
 import ast
-import requests
+import itertools
+import multiprocessing
+import os
+import threading
 
-from time import time, sleep
+from time import time
 from datetime import datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from compact import CompactFrame
+from metrics import EventLog
+from profiling import profiled, profiler
+from network import TwitchAuth, decodeJSON, defaultClient
+from state import ExtractState, PageSpill
+from storage import FrameBuilder, FrameWriter, framePath, findFrame, iterFrames, loadFrame, saveFrame
+from util import _pausedGC, parseStrColumn
+
+#Máximo de subqueries por request de /multiquery
+MULTIQUERY_SIZE = 10
+
+#(instancia, pasos) de [Data.transformChunks] con varios procesos, que los procesos heredan con fork
+_chunkTask = None
 
 class Data:
     
     #Constructor
-    def __init__(self, clientID, clientSecret):
-        try:
-            accessToken = requests.post(url = f'https://id.twitch.tv/oauth2/token?client_id={clientID}&client_secret={clientSecret}&grant_type=client_credentials')
-        except:
-            accessToken = None
-        self.accessToken = accessToken
+    def __init__(self, clientID, clientSecret, base_url = 'https://api.igdb.com/v4', auth_url = 'https://id.twitch.tv/oauth2/token', client = None, log_path = 'logs.jsonl'):
+        #El token de Twitch se pide con la primera request a IGDB y se renueva solo si caduca
+        self.client = client or defaultClient()
+        self.auth = TwitchAuth(clientID, clientSecret, auth_url, client = self.client)
         
-        try:
-            token = self.accessToken.json()['access_token']
-        except:
-            token = None
-        
-        self.headers = {'Client-ID' : clientID,
-                        "Authorization" : f"Bearer {token}"}
+        #Registro JSON-lines de keep_logs, escrito en segundo plano
+        self.events = EventLog(log_path)
         
+        self.base_url = base_url
         self.dataframes = {}
         self.main = None
+        self.report = None
+        
+        #Índices de las tablas de referencia, solo mientras dura [transformChunks]
+        self._lookups = None
+    
+    @property
+    def headers(self):
+        return self.auth.headers()
+    
+    def profile(self, enabled = True, memory = True, cprofile = None, directory = 'profiles'):
+        """
+        
+        PUBLIC METHOD
+        
+        
+        enabled (bool): Activa o desactiva el perfilado.
+        
+        memory (bool): Mide también el pico de memoria de cada etapa (tracemalloc).
+        
+        cprofile (str): Etapa que se perfila además con cProfile, por ejemplo 'Data.parseLists' o 'engines_years_fig'.
+        
+        directory (str): Carpeta de las salidas de cProfile y de los informes.
+        
+        Activa el perfilado compartido (profiling.profiler) de los métodos de Data y de las funciones de util y
+        visualization: tiempo real, tiempo de CPU y pico de memoria de cada llamada. Devuelve el perfilador, con
+        el que se obtiene el informe (report), se guarda (write) o se compara con uno anterior (compare).
+        """
+        
+        if enabled:
+            return profiler.enable(memory = memory, cprofile = cprofile, directory = directory)
+        profiler.disable()
+        return profiler
     
     #Los métodos [__getitem__] y [__setitem__] permiten utilizar la clase como un diccionario
     def __getitem__(self, key):
@@ -34,6 +80,7 @@ class Data:
     def __setitem__(self, key, value):
         self.dataframes[key] = value
         
+    @profiled()
     def read_csvs(self, paths):
         """
         
@@ -52,8 +99,33 @@ class Data:
                 self.main = df
             else:
                 self.dataframes[path[:-9]] = df
+    
+    @profiled()
+    def read_files(self, paths, columns = None):
+        """
+        
+        PUBLIC METHOD
+        
+        
+        paths (list<str>): Una lista de cadenas especificando el directorio de cada uno de los archivos.
+               El formato de los archivos debe ser {name}_data.{csv|parquet|feather}.
+        
+        columns (list<str>): Columnas que se leen del primer archivo (self.main). None para leerlas todas.
+                             En parquet y feather solo se leen del disco esas columnas.
+        
+        Igual que [read_csvs] pero para cualquier formato de [storage]. Las columnas de listas guardadas en
+        parquet o feather vuelven como listas de Python, sin tener que parsear texto.
+        """
         
-    def extract(self, endpoints, batches, batchSize = 500, fields = '*', keep_logs = False, show_logs = True, save_csv = False):
+        for index, path in enumerate(paths):
+            if index == 0:
+                self.main = loadFrame(path, columns = columns)
+            else:
+                name = os.path.basename(path).rsplit('_data.', 1)[0]
+                self.dataframes[name] = loadFrame(path)
+        
+    @profiled()
+    def extract(self, endpoints, batches, batchSize = 500, fields = '*', keep_logs = False, show_logs = True, save_csv = False, save_format = None, workers = 1, rate_limit = 4, pagination = 'offset', ranges = 1, incremental = False, state_path = 'extract_state.json', spill_dir = None, resume = False, multiquery = False):
         """
         
         PUBLIC METHOD
@@ -65,30 +137,143 @@ class Data:
         
         BatchSize (int): Número de datos extraidos en cada request (máximo permitido por la API: 500).
         
-        fields (str): Campos de las tablas extraidas de los endpoints. '*' para extraer todos.
+        fields (str | dict<str, str>): Campos de las tablas extraidas de los endpoints. '*' para extraer todos.
+                                       Con un diccionario, los campos de cada endpoint ('*' para los que no estén).
+                                       Los campos expandidos ('genres.name') se reciben ya aplanados: la columna
+                                       'genres' tiene las listas de nombres. Ver [projection].
         
-        keep_logs (bool): Guarda registros de las requests en un archivo logs.txt.
+        keep_logs (bool): Guarda registros de las requests, uno por línea en JSON, en el archivo [log_path] de la clase.
         
-        show_logs (bool): Imprime en la consola los registros de las requests.
+        show_logs (bool): Imprime en la consola los registros de las requests y el resumen de métricas del final.
         
         save_csv (bool): Guarda todos los pd.DataFrame generados en archivos .csv en formato {endpoint}_data.csv
         
+        save_format (str): 'csv', 'parquet' o 'feather'. Guarda los pd.DataFrame en {endpoint}_data.{formato}.
+                           Parquet y feather conservan las columnas de listas como listas nativas de Arrow.
+        
+        workers (int): Número de requests en vuelo a la vez por endpoint (máximo permitido por la API: 8).
+                       Con 1 se usa el bucle secuencial.
+        
+        rate_limit (float): Requests por segundo como máximo (límite de la API: 4). Se aplica al host de la API en el
+                            cliente HTTP compartido, así que lo respetan todas las requests a IGDB a la vez.
+        
+        pagination (str): 'offset' pagina con limit/offset. 'cursor' ordena por id y pide 'where id > last_id',
+                          así cada página cuesta lo mismo y no se saltan ni duplican filas si la tabla cambia.
+        
+        ranges (int): Solo con pagination = 'cursor'. Divide el espacio de id's en [ranges] rangos disjuntos que
+                      se recorren en paralelo (hasta [workers] a la vez).
+        
+        incremental (bool): Si el endpoint ya tiene marcas en [state_path] y datos previos, pide solo las filas con
+                            'updated_at' >= la marca y las combina por 'id' con los datos previos. Los datos previos
+                            son los que ya están en memoria (self.main o self.dataframes) o, si no, el archivo
+                            guardado {endpoint}_data.{parquet|feather|csv} del directorio actual (storage.findFrame,
+                            que prefiere parquet, después feather y por último csv). El resultado combinado solo se
+                            escribe en disco si se pide con [save_csv] o [save_format]. Si no hay marcas o datos
+                            previos, hace una extracción completa y guarda las marcas.
+        
+        state_path (str): Manifiesto JSON con las marcas de agua de cada endpoint.
+        
+        spill_dir (str): Si se indica, cada página se vuelca a disco en {spill_dir}/{endpoint}/ según llega,
+                         junto a un checkpoint con el último offset o cursor completado. El pd.DataFrame final
+                         se construye a partir de esas páginas.
+        
+        resume (bool): Reanuda desde el checkpoint de [spill_dir] una extracción interrumpida con los mismos parámetros.
+        
+        multiquery (bool | list<str>): Extrae los endpoints (todos con True, o solo los de la lista) a través de
+                                       /multiquery: primero cuenta las filas de cada endpoint y después pide sus
+                                       páginas de 10 en 10 por request, mezclando endpoints. Ideal para las tablas
+                                       pequeñas, que de otra forma gastan una request (y su turno) cada una.
+        
         
         Extrae datos de los endpoints de la API de IGDB, los convierte a un pd.DataFrame,
         guarda el primer pd.DataFrame bajo self.main y el resto bajo claves {endpoint}.
+        Al terminar guarda en self.report el resumen de métricas de la extracción (ver metrics.Metrics.summary).
         """
         
         #Trackeo del tiempo de ejecución de la función para llevar los registros
         start = time()
+        metrics = self.client.metrics
+        mark = metrics.mark()
+        
+        if resume and spill_dir is None:
+            raise ValueError("'resume' needs a 'spill_dir' to resume from!")
+        
+        if multiquery and spill_dir is not None:
+            raise ValueError("'multiquery' can't be combined with 'spill_dir'!")
+        
+        if save_csv and save_format is None:
+            save_format = 'csv'
+        
+        state = ExtractState(state_path) if incremental else None
+        
+        self.client.limit(self.base_url, rate_limit)
+        
+        #Para poder guardar las marcas necesitamos 'updated_at' aunque no se haya pedido
+        fields = {endpoint : (fields.get(endpoint, '*') if isinstance(fields, dict) else fields) for endpoint in endpoints}
+        if incremental:
+            fields = {endpoint : (fields_ if fields_ == '*' or 'updated_at' in [field.strip() for field in fields_.split(',')] else f'{fields_},updated_at')
+                      for endpoint, fields_ in fields.items()}
+        
+        #Solo se hace extracción incremental si hay marcas y datos previos con los que combinar
+        previous = [self._existingFrame(index, endpoint) if incremental else (None, False) for index, endpoint in enumerate(endpoints)]
+        marks = [state.get(endpoint, {}) if existing is not None else {} for endpoint, (existing, _) in zip(endpoints, previous)]
+        wheres = [f"updated_at >= {marks_['updated_at']}" if 'updated_at' in marks_ else None for marks_ in marks]
+        
+        #Los endpoints de [multiquery] se piden todos juntos antes de empezar
+        grouped = endpoints if multiquery is True else (multiquery or [])
+        grouped = {endpoint : where for endpoint, where in zip(endpoints, wheres) if endpoint in grouped}
+        prefetched = {}
+        if grouped:
+            with metrics.timer('stage_seconds', stage = 'extract', endpoint = self._path('multiquery')):
+                prefetched = self._fetchMultiquery(grouped, fields = fields, keep_logs = keep_logs, show_logs = show_logs, batches = batches, batchSize = batchSize, workers = workers)
         
         #Aquí iteramos sobre los endpoints
         for index, endpoint in enumerate(endpoints):
             
-            #Llamamos [_fetchData] que nos devuelve una lista con diccionarios de los datos del endpoint
-            data = self._fetchData(endpoint = f'https://api.igdb.com/v4/{endpoint}', headers = self.headers, fields = fields, keep_logs = keep_logs, show_logs = show_logs, batches = batches, batchSize = batchSize)
+            existing, fromCsv = previous[index]
+            marks_ = marks[index]
+            
+            #La extracción incremental siempre va por cursor y sin dividir en rangos
+            where = wheres[index]
+            mode = 'cursor' if where is not None else pagination
+            
+            spill = None
+            if spill_dir is not None:
+                signature = {'fields' : fields[endpoint], 'batchSize' : batchSize, 'pagination' : mode, 'ranges' : 1 if where else ranges, 'where' : where}
+                spill = PageSpill(spill_dir, endpoint, signature, resume = resume)
+            
+            #Los endpoints de /multiquery ya tienen su tiempo en el de la request conjunta
+            with metrics.timer('stage_seconds' if endpoint not in prefetched else 'frame_seconds', stage = 'extract', endpoint = self._path(endpoint)):
+                
+                #Llamamos [_fetchData] que nos devuelve una lista con diccionarios de los datos del endpoint
+                if endpoint in prefetched:
+                    data = prefetched[endpoint]
+                elif mode == 'cursor':
+                    data = self._fetchDataCursor(endpoint = f'{self.base_url}/{endpoint}', fields = fields[endpoint], keep_logs = keep_logs, show_logs = show_logs, batches = batches, batchSize = batchSize, workers = workers, ranges = 1 if where else ranges, where = where, spill = spill)
+                elif workers > 1:
+                    data = self._fetchDataConcurrent(endpoint = f'{self.base_url}/{endpoint}', fields = fields[endpoint], keep_logs = keep_logs, show_logs = show_logs, batches = batches, batchSize = batchSize, workers = workers, spill = spill)
+                else:
+                    data = self._fetchData(endpoint = f'{self.base_url}/{endpoint}', fields = fields[endpoint], keep_logs = keep_logs, show_logs = show_logs, batches = batches, batchSize = batchSize, spill = spill)
+                
+                #Creamos un pd.DataFrame con la lista data, o con las páginas volcadas a disco
+                df = data.frame() if spill is None else spill.frame()
+                df = self._flattenExpanded(df, fields[endpoint])
+            
+            metrics.inc('rows', df.shape[0], stage = 'extract', endpoint = self._path(endpoint))
             
-            #Creamos un pd.DataFrame con la lista data
-            df = pd.DataFrame(data)
+            #Combinamos los cambios con los datos previos
+            if 'updated_at' in marks_:
+                changed = df.shape[0]
+                df = self._upsert(existing, df, stringify = fromCsv)
+                
+                now = datetime.strftime(datetime.now(), '%x %X')
+                log_str = f'[Data.extract] | {now} | INCREMENTAL {endpoint} | updated_at >= {marks_["updated_at"]} | {changed} rows changed | {df.shape[0]} rows total'
+                
+                if keep_logs:
+                    self._log(log_str, event = 'incremental', endpoint = endpoint, since = marks_['updated_at'], changed = changed, rows = df.shape[0])
+                
+                if show_logs:
+                    print(log_str)
             
             #Si es el primer endpoint de la lista, 
             if index == 0:
@@ -98,9 +283,13 @@ class Data:
                 #si no, lo guardamos bajo una clave
                 self.dataframes[endpoint] = df
                 
-            #Creamos un csv si es necesario
-            if save_csv:
-                df.to_csv(f'{endpoint}_data.csv')
+            #Creamos un archivo si es necesario
+            if save_format is not None:
+                saveFrame(df, framePath(endpoint, save_format))
+            
+            #Las marcas solo se guardan cuando el endpoint ha terminado
+            if incremental:
+                state.update(endpoint, df)
                 
         #Trackeo del tiempo de ejecución de la función para llevar los registros
         end = time()
@@ -113,14 +302,22 @@ class Data:
         now = datetime.strftime(datetime.now(), '%x %X')
         log_str = f'[Data.extract] | {now} | DATA EXTRACTION FINISHED | TOTAL TIME: {hours} hours, {minutes} minutes and {seconds} seconds'
         
+        #Resumen de las métricas de esta extracción (requests, bytes, latencias, reintentos, esperas y filas por segundo)
+        self.report = metrics.summary(since = mark)
+        
         #Guardamos registros si es necesario
         if keep_logs:
-            self._log(log_str)
+            self._log(log_str, event = 'extract', endpoints = endpoints, seconds = round(end - start, 3))
+            for (stage, endpoint_), row in self.report.iterrows():
+                self._log(f'[METRICS] | {now} | {stage} | {endpoint_}', event = 'metrics', stage = stage, endpoint = endpoint_, **row.dropna().to_dict())
+            self.events.flush()
 
         #Mostramos registros si es necesario
         if show_logs:
             print(log_str)
+            print(f'\n{self.report.to_string()}\n')
     
+    @profiled()
     def parseLists(self, columns, data_frames, fields, data_frame = None, accessColumns = 'id', inplace = False):
         """
         
@@ -190,6 +387,320 @@ class Data:
         if not inplace:
             return df
     
+    @profiled()
+    def resolve(self, plan, data_frame = None, inplace = False, parallel = False):
+        """
+        
+        PUBLIC METHOD
+        
+        
+        plan (dict<str, list<tuple> or dict>): Para cada columna de salida, la lista de búsquedas (table, key, field)
+                                               que se encadenan: los valores de [field] de un paso son los id's que se
+                                               buscan en [key] del siguiente. También puede ser un diccionario con:
+                                               'steps' (la lista anterior), 'source' (columna de entrada, por defecto
+                                               la misma) y 'dropna' (elimina los elementos no encontrados entre pasos
+                                               y deja como np.nan las listas que quedan vacías).
+        
+        data_frame (str): Clave del pd.DataFrame a modificar. None para self.main.
+        
+        inplace (bool): Se marca como True si se quiere realizar la operación in-place.
+        
+        parallel (bool): Resuelve las columnas en paralelo (una por hilo).
+        
+        Alternativa declarativa a encadenar varias llamadas a [parseLists]. Cada columna de entrada se aplana una
+        sola vez aunque la usen varias columnas de salida, cada tabla de referencia se indexa una sola vez, y las
+        búsquedas encadenadas se hacen sobre el array aplanado sin DataFrames intermedios.
+        
+        Ejemplo (equivale a las celdas de transformación del notebook):
+        
+            data.resolve({'audio_language_supports' : {'source' : 'language_supports',
+                                                       'steps' : [('language_supports', 'id', 'language_1'), ('languages', 'id', 'name')],
+                                                       'dropna' : True},
+                          'game_engines' : [('game_engines', 'id', 'name')],
+                          'genres' : [('genres', 'id', 'name')]},
+                         inplace = True)
+        """
+        
+        df = self.main if data_frame is None else self.dataframes[data_frame]
+        
+        steps = self._planSteps(plan)
+        
+        #Cada tabla de referencia se indexa una vez
+        lookups = {}
+        for _, chain, _ in steps.values():
+            for table, key, field in chain:
+                if (table, key, field) not in lookups:
+                    lookups[(table, key, field)] = self._getLookup(self.dataframes[table], key, field)
+        
+        #Cada columna de entrada se aplana una vez
+        exploded = {}
+        for source, _, _ in steps.values():
+            if source not in exploded:
+                series = df[source]
+                if self._isStr(series):
+                    series = parseStrColumn(series, parser = self._parseStr)
+                exploded[source] = self._explodeIds(series)
+        
+        def run(column):
+            source, chain, dropna = steps[column]
+            return column, self._chainIds(exploded[source], [lookups[step] for step in chain], dropna = dropna, index = df.index, name = column)
+        
+        if parallel and len(steps) > 1:
+            with ThreadPoolExecutor(max_workers = len(steps)) as pool:
+                results = dict(pool.map(run, steps))
+        else:
+            results = dict(map(run, steps))
+        
+        #Lógica de in-place
+        if inplace:
+            for column, series in results.items():
+                df[column] = series
+        else:
+            return df.assign(**results)
+    
+    def projection(self, columns, plan = None, endpoint = 'games'):
+        """
+        
+        PUBLIC METHOD
+        
+        
+        columns (list<str>): Columnas de [endpoint] que se van a usar (las que se pasarían a [filterColumns]).
+        
+        plan (dict): Plan de [resolve] que se aplicaría después de extraer.
+        
+        endpoint (str): Endpoint principal.
+        
+        Calcula qué pedir a IGDB para no descargar columnas ni tablas que luego se descartan. Devuelve (fields, plan):
+        
+            fields (dict<str, str>): Campos por endpoint para [extract] (list(fields) son los endpoints a extraer).
+                                     [endpoint] pide solo [columns], y las columnas del plan que se resuelven sobre
+                                     sí mismas buscando por 'id' se expanden en el servidor ('genres.name'), así que
+                                     sus tablas de referencia ya no hacen falta. Las tablas que sigue necesitando el
+                                     plan se piden enteras.
+            
+            plan (dict): Las entradas del plan que no se han expandido, para [resolve].
+        
+        Ejemplo (columnas y búsquedas del notebook):
+        
+            fields, plan = data.projection(['id', 'name', 'language_supports', 'game_engines', 'first_release_date', 'genres', 'category'],
+                                           plan = {'game_engines' : [('game_engines', 'id', 'name')],
+                                                   'genres' : [('genres', 'id', 'name')]})
+            data.extract(endpoints = list(fields), fields = fields, batches = 10000)
+            data.resolve(plan, inplace = True)
+        """
+        
+        plan = plan or {}
+        steps = self._planSteps(plan)
+        
+        #Una columna se puede expandir si se resuelve sobre sí misma, solo por 'id', sin quitar elementos entre pasos,
+        #y ninguna otra entrada del plan necesita sus id's
+        sources = [source for source, _, _ in steps.values()]
+        expand = {column : chain for column, (source, chain, dropna) in steps.items()
+                  if source == column and column in columns and sources.count(column) == 1 and not dropna and all(key == 'id' for _, key, _ in chain)}
+        
+        fields = {endpoint : ','.join(f'{column}.' + '.'.join(field for _, _, field in expand[column]) if column in expand else column for column in columns)}
+        
+        remaining = {column : spec for column, spec in plan.items() if column not in expand}
+        for _, chain, _ in self._planSteps(remaining).values():
+            for table, _, _ in chain:
+                fields.setdefault(table, '*')
+        
+        return fields, remaining
+    
+    @profiled()
+    def compact(self, list_columns = None, data_frame = None, show_logs = True, keep_logs = False):
+        """
+        
+        PUBLIC METHOD
+        
+        
+        list_columns (list<str>): Columnas de listas. None para detectarlas automáticamente.
+        
+        data_frame (str): Clave del pd.DataFrame a compactar. None para self.main.
+        
+        show_logs (bool): Imprime en la consola la memoria antes y después.
+        
+        keep_logs (bool): Guarda el registro en el archivo [log_path].
+        
+        Devuelve una versión compacta (compact.CompactFrame) del DataFrame: cada columna de listas pasa a un
+        array de códigos int32 más offsets sobre un diccionario de categorías, las columnas de mes y año a
+        enteros, las fechas a datetime64 y el texto repetido a 'category'. Las listas se reconstruyen solo
+        cuando se piden con [CompactFrame.toList] o [CompactFrame.toFrame].
+        """
+        
+        df = self.main if data_frame is None else self.dataframes[data_frame]
+        
+        compacted = CompactFrame.fromFrame(df, list_columns = list_columns)
+        
+        before = df.memory_usage(deep = True).sum()
+        after = compacted.memory_usage()
+        
+        #Registro
+        now = datetime.strftime(datetime.now(), '%x %X')
+        log_str = f'[Data.compact] | {now} | MEMORY: {round(before / 2**20, 2)} MiB -> {round(after / 2**20, 2)} MiB | SAVED {round(100 * (1 - after / before), 1)}%'
+        
+        if keep_logs:
+            self._log(log_str, event = 'compact', before = int(before), after = int(after))
+        
+        if show_logs:
+            print(log_str)
+        
+        return compacted
+    
+    @profiled()
+    def parseDates(self, column = 'first_release_date', data_frame = None, inplace = False):
+        """
+        
+        PUBLIC METHOD
+        
+        
+        column (str): Columna con la fecha en segundos desde epoch (first_release_date de IGDB).
+        
+        data_frame (str): Clave del pd.DataFrame a modificar. None para self.main.
+        
+        inplace (bool): Se marca como True si se quiere realizar la operación in-place.
+        
+        Convierte [column] a texto 'mm-dd-YYYY' (NaN donde no hay fecha) con llamadas vectorizadas (pd.to_datetime y
+        _dateText) y crea las columnas 'month_release' (Int8, 1-12) y 'year_release' (Int16), con pd.NA donde no hay
+        fecha. Sustituye a los tres apply fila a fila del notebook (fromtimestamp + strftime y los dos cortes de
+        texto). Las gráficas convierten los meses a su etiqueta con cube.MONTHS.
+        
+        Las fechas se calculan en UTC y no en la zona horaria local como hacía fromtimestamp, así que en una máquina
+        fuera de UTC las publicadas cerca de medianoche pueden cambiar de día (y de mes o año). Además, en Airtable los
+        meses pasan de '06' a '6', así que la primera util.syncToAirtable después del cambio ve todas las filas como
+        modificadas y las vuelve a enviar (una sola vez; después los hashes de la caché ya coinciden).
+        """
+        
+        #Lógica de in-place
+        if inplace:
+            df = self.main if data_frame is None else self.dataframes[data_frame]
+        else:
+            df = self.main.copy() if data_frame is None else self.dataframes[data_frame].copy()
+        
+        dates = pd.to_datetime(df[column], unit = 's', errors = 'coerce')
+        df[column] = _dateText(dates)
+        df['month_release'] = dates.dt.month.astype('Int8')
+        df['year_release'] = dates.dt.year.astype('Int16')
+        
+        if not inplace:
+            return df
+    
+    @profiled()
+    def transformChunks(self, source, steps, output = None, chunk_size = 100000, columns = None, schema = None, processes = 1, show_logs = True, keep_logs = False):
+        """
+        
+        PUBLIC METHOD
+        
+        
+        source (str or pd.DataFrame): Archivo de [storage] con la tabla principal, que se lee por bloques sin cargarlo
+                                      entero, o un pd.DataFrame ya cargado. None para self.main.
+        
+        steps (list<callable>): Pasos que se aplican a cada bloque, en orden. Cada paso recibe esta instancia con el
+                                bloque en self.main y lo modifica in-place, o devuelve el bloque nuevo (pd.DataFrame).
+        
+        output (str or callable): Archivo donde se van escribiendo los bloques (storage.FrameWriter), una función
+                                  output(chunk, first_row) que recibe cada bloque y la posición de su primera fila, o
+                                  None para concatenar los bloques en self.main.
+        
+        chunk_size (int): Filas por bloque.
+        
+        columns (list<str>): Columnas que se leen de [source]. None para leerlas todas.
+        
+        schema (pa.Schema): Esquema del archivo de salida, ver storage.FrameWriter.
+        
+        processes (int): Procesos que transforman bloques a la vez (None para uno por núcleo). Con más de uno, el
+                         primer bloque se transforma en este proceso, así los índices de las tablas de referencia
+                         quedan calculados, y el resto se reparte en un pool de procesos creado con fork: los procesos
+                         heredan la instancia, las tablas, los índices y los pasos sin copiarlos, y a cada uno solo se
+                         le envía su bloque. Los bloques se recogen en orden, el resultado es el mismo que con un
+                         proceso. Solo en sistemas con fork (Linux, macOS).
+        
+        show_logs (bool): Imprime en la consola el resumen al terminar.
+        
+        keep_logs (bool): Guarda un registro por bloque en el archivo [log_path].
+        
+        Modo por bloques de las transformaciones del notebook: la tabla principal pasa por los mismos pasos que con
+        self.main entero, pero de [chunk_size] filas en [chunk_size] filas, mientras las tablas de referencia
+        (self.dataframes) se quedan en memoria y se indexan una sola vez para todos los bloques. Con [output] el
+        pico de memoria depende del tamaño del bloque, no del número de juegos. Las tablas de referencia se preparan
+        antes (por ejemplo [splitColumn] sobre 'language_supports') y no deben cambiar durante los pasos.
+        
+        Ejemplo (celdas de transformación del notebook, con la salida directamente en Airtable):
+        
+            data.splitColumn(data_frame = 'language_supports', column = 'language', query_field = 'language_support_type', queries = [1, 2], inplace = True)
+            data.transformChunks('games_data.parquet',
+                                 steps = [lambda data : data.filterColumns(['id', 'name', 'game_engines', 'genres'], inplace = True),
+                                          lambda data : data.parseLists(columns = ['game_engines'], data_frames = ['game_engines'], fields = ['name'], inplace = True),
+                                          lambda data : data.parseLists(columns = ['genres'], data_frames = ['genres'], fields = ['name'], inplace = True)],
+                                 output = lambda chunk, first_row : loadToAirtable(key, app, tbls, chunk, first_row = first_row))
+        
+        Para repartir las transformaciones del notebook de self.main entre todos los núcleos:
+        
+            data.transformChunks(None, steps, chunk_size = 20000, processes = None)
+        
+        Devuelve el número de filas procesadas.
+        """
+        
+        start = time()
+        
+        processes = processes or os.cpu_count()
+        if processes > 1 and 'fork' not in multiprocessing.get_all_start_methods():
+            raise ValueError("'processes' > 1 needs the 'fork' start method, use processes = 1 on this system!")
+        
+        if source is None:
+            source = self.main
+        
+        if isinstance(source, pd.DataFrame):
+            frame = source if columns is None else source[columns]
+            #Copia de cada bloque para que los pasos in-place no modifiquen [source]
+            chunks = (frame.iloc[first : first + chunk_size].copy() for first in range(0, len(frame), chunk_size))
+        else:
+            chunks = iterFrames(source, chunk_size = chunk_size, columns = columns)
+        
+        writer = FrameWriter(output, schema = schema) if isinstance(output, str) else None
+        results = []
+        main, self.main = self.main, None
+        self._lookups = {}
+        rows = 0
+        
+        try:
+            for index, chunk in enumerate(self._transformedChunks(chunks, steps, processes)):
+                if writer is not None:
+                    writer.write(chunk)
+                elif output is not None:
+                    output(chunk, rows)
+                else:
+                    results.append(chunk)
+                
+                rows += len(chunk)
+                self.client.metrics.inc('rows', len(chunk), stage = 'transform')
+                
+                if keep_logs:
+                    now = datetime.strftime(datetime.now(), '%x %X')
+                    self._log(f'[Data.transformChunks] | {now} | CHUNK {index + 1} | ROWS {rows - len(chunk)}-{rows}', event = 'chunk', chunk = index + 1, rows = len(chunk))
+        finally:
+            self._lookups = None
+            self.main = main
+            if writer is not None:
+                writer.close()
+        
+        if output is None:
+            self.main = pd.concat(results) if results else pd.DataFrame(columns = columns)
+        
+        self.client.metrics.inc('stage_seconds', time() - start, stage = 'transform')
+        
+        #Registro
+        now = datetime.strftime(datetime.now(), '%x %X')
+        log_str = f'[Data.transformChunks] | {now} | {rows} ROWS IN {-(-rows // chunk_size)} CHUNKS | {processes} PROCESSES | TOTAL TIME: {round(time() - start, 2)}s'
+        
+        if keep_logs:
+            self._log(log_str, event = 'transform', rows = rows)
+        
+        if show_logs:
+            print(log_str)
+        
+        return rows
+    
     def filterColumns(self, columns, inplace = False):
         """
         
@@ -210,12 +721,26 @@ class Data:
             self.main = self.main[columns]
             
 
-    def splitColumn(self, column, query_field, queries, data_frame = None , inplace = False):
+    @profiled()
+    def splitColumn(self, column, query_field, queries = None, data_frame = None , inplace = False):
         """
         
         PUBLIC METHOD
 
         
+        column (str): Columna cuyos valores se reparten.
+        
+        query_field (str): Columna con la que se compara cada query.
+        
+        queries (list<dynamic>): Valores de [query_field]. None para usar todos los valores distintos (ordenados).
+        
+        data_frame (str): Clave del pd.DataFrame a modificar. None para self.main.
+        
+        inplace (bool): Se marca como True si se quiere realizar la operación in-place.
+        
+        Crea una columna {column}_{query} por cada query con el valor de [column] en las filas donde
+        [query_field] == query y np.nan en el resto. [query_field] se factoriza una sola vez y cada columna
+        sale de una máscara sobre esos códigos.
         """
         if inplace:
             if data_frame is None:
@@ -228,14 +753,13 @@ class Data:
             else:
                 df = self.dataframes[data_frame].copy()
 
-        for element in queries:
-            self._filter(df, column, query_field, element)
+        self._split(df, column, query_field, queries)
 
         if not inplace:
             return df
         
     
-    def _fetchData(self, endpoint, headers, fields, batches = 100000, batchSize = 500, keep_logs = True, show_logs = False):
+    def _fetchData(self, endpoint, fields, batches = 100000, batchSize = 500, keep_logs = True, show_logs = False, spill = None):
         """
         
         PRIVATE METHOD
@@ -243,20 +767,23 @@ class Data:
 
         """
         
-        data = []
+        data = FrameBuilder()
         startTime = time()
 
-        for offset in range(0, batchSize * batches, batchSize):
-            start = time()
-
-            response = requests.post(url = endpoint, headers = headers, data = f'fields {fields}; limit {batchSize}; offset {offset};')
-
+        for offset in range(self._firstOffset(spill, batches, batchSize), batchSize * batches, batchSize):
+            response, responseTime = self._request(endpoint, f'fields {fields}; limit {batchSize}; offset {offset};')
             end = time()
-            responseTime = end - start
 
-            data.extend(response.json())
+            page = decodeJSON(response.content)
+
+            if spill is None:
+                data.append(page)
+            elif len(page) > 0:
+                spill.write(f'page_{offset:012d}', page, 'offset', offset)
 
-            if len(response.json()) == 0:
+            if len(page) == 0:
+                if spill is not None:
+                    spill.mark('done', True)
                 break
 
             now = datetime.strftime(datetime.now(), '%x %X')
@@ -267,35 +794,491 @@ class Data:
                 print(log_str)
 
             if keep_logs:
-                self._log(log_str)
-
-            if responseTime < 0.255:
-                sleep(0.255 - responseTime)
+                self._log(log_str, event = 'request', endpoint = endpoint, status = response.status_code, batch = round(offset/batchSize) + 1, rows = len(page), seconds = round(responseTime, 3))
 
         endTime = time()
 
         duration = endTime - startTime
 
         now = datetime.strftime(datetime.now(), '%x %X')
-        log_str = f'[FETCH_DATA] | {now} | Total time {round(duration, 2)}s | Dataset size {len(data)}'
+        log_str = f'[FETCH_DATA] | {now} | Total time {round(duration, 2)}s | Dataset size {len(data) if spill is None else spill.rows}'
 
         if show_logs:
             print(f'\n{log_str}\n\n' + '='*100 + '\n\n')
 
         if keep_logs:
-            self._log(log_str)
+            self._log(log_str, event = 'fetch', endpoint = endpoint, rows = len(data) if spill is None else spill.rows, seconds = round(duration, 3))
         return data        
     
-    def _log(self, log_str):
+    def _fetchDataConcurrent(self, endpoint, fields, batches = 100000, batchSize = 500, workers = 8, keep_logs = True, show_logs = False, spill = None):
+        """
+        
+        PRIVATE METHOD
+        
+        
+        Versión concurrente de [_fetchData]. Mantiene hasta [workers] requests en vuelo, limitadas por el
+        TokenBucket del host en el cliente compartido, y reensambla las páginas en orden de offset.
+        En cuanto llega una página vacía deja de pedir más y descarta las que estuvieran en vuelo.
+        """
+        
+        data = FrameBuilder()
+        startTime = time()
+        offsets = iter(range(self._firstOffset(spill, batches, batchSize), batchSize * batches, batchSize))
+        
+        #Cola de (offset, future) en el mismo orden en el que se han pedido
+        pending = deque()
+        stop = threading.Event()
+        
+        def submit():
+            offset = next(offsets, None)
+            if offset is not None:
+                body = f'fields {fields}; limit {batchSize}; offset {offset};'
+                pending.append((offset, pool.submit(self._request, endpoint, body, stop = stop)))
+        
+        pool = ThreadPoolExecutor(max_workers = workers)
+        try:
+            for _ in range(workers):
+                submit()
+            
+            while pending:
+                offset, future = pending.popleft()
+                response, responseTime = future.result()
+                if response is None:
+                    break
+                
+                page = decodeJSON(response.content)
+                if len(page) == 0:
+                    if spill is not None:
+                        spill.mark('done', True)
+                    break
+                
+                if spill is None:
+                    data.append(page)
+                else:
+                    spill.write(f'page_{offset:012d}', page, 'offset', offset)
+                
+                #Una página incompleta es la última, no hace falta esperar a la siguiente vacía
+                if len(page) < batchSize:
+                    stop.set()
+                    if spill is not None:
+                        spill.mark('done', True)
+                
+                now = datetime.strftime(datetime.now(), '%x %X')
+                
+                log_str = f'[REQUEST] | {now} | Status {response.status_code} | Endpoint: {endpoint} | Batch {round(offset/batchSize) + 1} | Response time [{round(responseTime, 2)}s] | Time elapsed [{round(time() - startTime, 2)}s]'
+                
+                if show_logs:
+                    print(log_str)
+                
+                if keep_logs:
+                    self._log(log_str, event = 'request', endpoint = endpoint, status = response.status_code, batch = round(offset/batchSize) + 1, rows = len(page), seconds = round(responseTime, 3))
+                
+                #Las requests especulativas que queden en vuelo no se leen (en modo offline ni siquiera están en caché)
+                if len(page) < batchSize:
+                    break
+                
+                submit()
+        finally:
+            #Las requests que no han empezado se cancelan, las que están esperando turno se saltan
+            stop.set()
+            pool.shutdown(wait = True, cancel_futures = True)
+        
+        duration = time() - startTime
+        
+        now = datetime.strftime(datetime.now(), '%x %X')
+        log_str = f'[FETCH_DATA] | {now} | Total time {round(duration, 2)}s | Dataset size {len(data) if spill is None else spill.rows}'
+        
+        if show_logs:
+            print(f'\n{log_str}\n\n' + '='*100 + '\n\n')
+        
+        if keep_logs:
+            self._log(log_str, event = 'fetch', endpoint = endpoint, rows = len(data) if spill is None else spill.rows, seconds = round(duration, 3))
+        return data
+    
+    def _fetchDataCursor(self, endpoint, fields, batches = 100000, batchSize = 500, workers = 1, ranges = 1, where = None, keep_logs = True, show_logs = False, spill = None):
+        """
+        
+        PRIVATE METHOD
+        
+        
+        Paginación por cursor (keyset): cada página pide 'where id > last_id; sort id asc;'.
+        Si ranges > 1, divide (0, max_id] en rangos disjuntos que se recorren en paralelo y se concatenan en orden.
+        [batches] es el máximo de páginas entre todos los rangos, igual que sin rangos: los rangos lo comparten y
+        cada página con datos gasta una (la respuesta vacía que cierra un rango no cuenta), así los rangos con más
+        id's pueden pedir más páginas. Si se alcanza el máximo, qué páginas quedan dentro depende del orden en que
+        se recorren los rangos en paralelo.
+        [where] es una condición extra (conjunción con &) que se añade a la del cursor.
+        Con [spill], el checkpoint guarda los rangos y el cursor de cada uno para poder reanudar.
+        """
+        
+        startTime = time()
+        
+        if spill is not None and spill.get('bounds') is not None:
+            #Al reanudar se reutilizan los mismos rangos aunque el id máximo haya cambiado
+            bounds = [tuple(bound) for bound in spill.get('bounds')]
+        elif ranges > 1:
+            #Pedimos el id más alto para poder repartir el espacio de id's
+            response, _ = self._request(endpoint, 'fields id; sort id desc; limit 1;')
+            page = decodeJSON(response.content)
+            maxId = page[0]['id'] if page else 0
+            step = -(-maxId // ranges)
+            bounds = [(lower, min(lower + step, maxId)) for lower in range(0, maxId, step)] if maxId else []
+        else:
+            bounds = [(0, None)]
+        
+        if spill is not None:
+            spill.mark('bounds', bounds)
+        
+        #Máximo de páginas compartido por todos los rangos, descontando las ya guardadas si se reanuda.
+        #Cada request reserva una página; si vuelve vacía se devuelve, y mientras haya reservas pendientes
+        #los demás rangos esperan a saber si queda sitio en lugar de terminar antes de tiempo
+        done = sum(spill.get(f'range_{index}', {}).get('batch', 0) for index in range(len(bounds))) if spill is not None else 0
+        budget = {'remaining' : batches - done, 'reserved' : 0}
+        budgetLock = threading.Condition()
+        
+        def take():
+            with budgetLock:
+                while budget['remaining'] - budget['reserved'] <= 0 < budget['reserved']:
+                    budgetLock.wait()
+                if budget['remaining'] - budget['reserved'] <= 0:
+                    return False
+                budget['reserved'] += 1
+                return True
+        
+        def release(used):
+            with budgetLock:
+                budget['reserved'] -= 1
+                budget['remaining'] -= used
+                budgetLock.notify_all()
+        
+        def walk(rangeIndex, lower, upper):
+            data = FrameBuilder()
+            checkpoint = spill.get(f'range_{rangeIndex}', {}) if spill is not None else {}
+            if checkpoint.get('done'):
+                return data
+            
+            lastId = checkpoint.get('cursor', lower)
+            for batch in itertools.count(checkpoint.get('batch', 0)):
+                if not take():
+                    break
+                conditions = [f'id > {lastId}']
+                if upper is not None:
+                    conditions.append(f'id <= {upper}')
+                if where is not None:
+                    conditions.append(where)
+                body = f'fields {fields}; where {" & ".join(conditions)}; sort id asc; limit {batchSize};'
+                
+                page = []
+                try:
+                    response, responseTime = self._request(endpoint, body)
+                    page = decodeJSON(response.content)
+                finally:
+                    release(1 if page else 0)
+                if len(page) == 0:
+                    if spill is not None:
+                        spill.mark(f'range_{rangeIndex}', {'cursor' : lastId, 'batch' : batch, 'done' : True})
+                    break
+                lastId = page[-1]['id']
+                
+                if spill is None:
+                    data.append(page)
+                else:
+                    done = len(page) < batchSize
+                    spill.write(f'range_{rangeIndex:04d}_page_{batch:06d}', page, f'range_{rangeIndex}', {'cursor' : lastId, 'batch' : batch + 1, 'done' : done})
+                
+                now = datetime.strftime(datetime.now(), '%x %X')
+                
+                log_str = f'[REQUEST] | {now} | Status {response.status_code} | Endpoint: {endpoint} | Range {rangeIndex + 1} | Batch {batch + 1} | Cursor id > {lastId} | Response time [{round(responseTime, 2)}s] | Time elapsed [{round(time() - startTime, 2)}s]'
+                
+                if show_logs:
+                    print(log_str)
+                
+                if keep_logs:
+                    self._log(log_str, event = 'request', endpoint = endpoint, status = response.status_code, range = rangeIndex + 1, batch = batch + 1, cursor = lastId, rows = len(page), seconds = round(responseTime, 3))
+                
+                if len(page) < batchSize:
+                    break
+            return data
+        
+        with ThreadPoolExecutor(max_workers = max(1, min(workers, len(bounds)))) as pool:
+            futures = [pool.submit(walk, index, lower, upper) for index, (lower, upper) in enumerate(bounds)]
+            data = FrameBuilder()
+            for future in futures:
+                data.extend(future.result())
+        
+        duration = time() - startTime
+        
+        now = datetime.strftime(datetime.now(), '%x %X')
+        log_str = f'[FETCH_DATA] | {now} | Total time {round(duration, 2)}s | Dataset size {len(data) if spill is None else spill.rows}'
+        
+        if show_logs:
+            print(f'\n{log_str}\n\n' + '='*100 + '\n\n')
+        
+        if keep_logs:
+            self._log(log_str, event = 'fetch', endpoint = endpoint, rows = len(data) if spill is None else spill.rows, seconds = round(duration, 3))
+        return data
+    
+    def _fetchMultiquery(self, endpoints, fields, batches = 100000, batchSize = 500, workers = 1, keep_logs = True, show_logs = False):
+        """
+        
+        PRIVATE METHOD
+        
+        
+        endpoints (dict<str, str>): Endpoints a extraer y su condición where (None si no hay).
+        
+        fields (dict<str, str>): Campos de cada endpoint.
+        
+        Extrae varios endpoints a través de /multiquery (máximo 10 subqueries por request). Primero pide el número
+        de filas de cada endpoint con subqueries /count, así se sabe exactamente qué páginas hay que pedir, y después
+        reparte todas las páginas de todos los endpoints en requests de 10 subqueries, hasta [workers] en vuelo.
+        Devuelve un diccionario endpoint -> lista de filas, en el mismo orden que la paginación por offset.
+        """
+        
+        startTime = time()
+        url = f'{self.base_url}/multiquery'
+        
+        def where(endpoint):
+            return f' where {endpoints[endpoint]};' if endpoints[endpoint] is not None else ''
+        
+        def chunks(items):
+            return [items[i : i + MULTIQUERY_SIZE] for i in range(0, len(items), MULTIQUERY_SIZE)]
+        
+        #Número de filas de cada endpoint
+        counts = {}
+        for chunk in chunks(list(endpoints)):
+            body = ''.join(f'query {endpoint}/count "{endpoint}" {{{where(endpoint)} }};' for endpoint in chunk)
+            response, _ = self._request(url, body)
+            counts.update({result['name'] : result['count'] for result in decodeJSON(response.content)})
+        
+        #Todas las páginas (endpoint, offset), como mucho [batches] por endpoint
+        pages = [(endpoint, offset) for endpoint in endpoints for offset in range(0, min(counts[endpoint], batches * batchSize), batchSize)]
+        
+        def fetch(chunk):
+            body = ''.join(f'query {endpoint} "{endpoint} {offset}" {{ fields {fields[endpoint]};{where(endpoint)} sort id asc; limit {batchSize}; offset {offset}; }};' for endpoint, offset in chunk)
+            return self._request(url, body)
+        
+        data = {endpoint : FrameBuilder() for endpoint in endpoints}
+        with ThreadPoolExecutor(max_workers = max(1, workers)) as pool:
+            for batch, (chunk, (response, responseTime)) in enumerate(zip(chunks(pages), pool.map(fetch, chunks(pages)))):
+                for (endpoint, _), result in zip(chunk, decodeJSON(response.content)):
+                    data[endpoint].append(result['result'])
+                
+                now = datetime.strftime(datetime.now(), '%x %X')
+                
+                log_str = f'[REQUEST] | {now} | Status {response.status_code} | Endpoint: {url} | Batch {batch + 1} | Queries {", ".join(dict.fromkeys(endpoint for endpoint, _ in chunk))} | Response time [{round(responseTime, 2)}s] | Time elapsed [{round(time() - startTime, 2)}s]'
+                
+                if show_logs:
+                    print(log_str)
+                
+                if keep_logs:
+                    self._log(log_str, event = 'request', endpoint = url, status = response.status_code, batch = batch + 1, queries = list(dict.fromkeys(endpoint for endpoint, _ in chunk)), seconds = round(responseTime, 3))
+        
+        duration = time() - startTime
+        
+        now = datetime.strftime(datetime.now(), '%x %X')
+        log_str = f'[FETCH_DATA] | {now} | Total time {round(duration, 2)}s | Dataset size {sum(len(rows) for rows in data.values())} | Endpoints {", ".join(endpoints)}'
+        
+        if show_logs:
+            print(f'\n{log_str}\n\n' + '='*100 + '\n\n')
+        
+        if keep_logs:
+            self._log(log_str, event = 'fetch', endpoint = url, rows = sum(len(rows) for rows in data.values()), endpoints = list(endpoints), seconds = round(duration, 3))
+        return data
+    
+    def _firstOffset(self, spill, batches, batchSize):
+        """
+        
+        PRIVATE METHOD
+        
+        
+        Primer offset a pedir: 0, el siguiente al último completado del checkpoint, o el final si ya había terminado.
+        """
+        
+        if spill is None:
+            return 0
+        if spill.get('done'):
+            return batchSize * batches
+        return spill.get('offset', -batchSize) + batchSize
+    
+    def _request(self, endpoint, body, stop = None):
+        """
+        
+        PRIVATE METHOD
+        
+        
+        POST a IGDB a través del cliente compartido, que respeta el límite de requests por segundo del host,
+        reintenta con backoff si la API responde 429 o 5xx y renueva el token si caduca. Las queries de IGDB
+        son de lectura, así que se pueden servir desde la caché del cliente si tiene una.
+        Devuelve la respuesta y su tiempo de respuesta, o (None, 0) si [stop] se activa antes de enviarla.
+        """
+        
+        return self.client.request('POST', endpoint, auth = self.auth, data = body, cancel = stop, cacheable = True, idempotent = True, stage = 'extract')
+    
+    def _existingFrame(self, index, endpoint):
+        """
+        
+        PRIVATE METHOD
+        
+        
+        Devuelve los datos previos del endpoint (de memoria o de {endpoint}_data.*) y si vienen de un csv.
+        """
+        
+        existing = self.main if index == 0 else self.dataframes.get(endpoint)
+        if existing is not None:
+            return existing, False
+        
+        path, format = findFrame(endpoint)
+        if format == 'csv':
+            return pd.read_csv(path, index_col = 0), True
+        if format is not None:
+            return loadFrame(path), False
+        return None, False
+    
+    def _upsert(self, existing, changes, stringify = False):
+        """
+        
+        PRIVATE METHOD
+        
+        
+        Sustituye en [existing] las filas cuyo 'id' aparece en [changes] y añade las nuevas. Ordena por 'id'.
+        Si [existing] viene de un csv, las listas de [changes] se pasan a str para que la columna sea homogénea.
+        """
+        
+        if changes.shape[0] == 0:
+            return existing
+        
+        if stringify:
+            changes = changes.copy()
+            for column in changes.columns[changes.dtypes == object]:
+                changes[column] = changes[column].apply(lambda x : str(x) if isinstance(x, list) else x)
+        
+        df = pd.concat([existing[~existing['id'].isin(changes['id'])], changes], ignore_index = True)
+        return df.sort_values('id', ignore_index = True)
+    
+    def _log(self, log_str, event = 'log', **fields):
         """
         
         PRIVATE METHOD
 
         
+        Encola el registro en [self.events] como una línea JSON con el mensaje y los campos [fields].
+        """
+        self.events.write(event, message = log_str, **fields)
+    
+    def _path(self, endpoint):
+        #Etiqueta endpoint de las métricas: la ruta de la url, igual que en network.HttpClient
+        return urlsplit(f'{self.base_url}/{endpoint}').path
+        
+    def _planSteps(self, plan):
         """
-        with open('logs.txt', 'a+') as file:
-            file.write(f'{log_str}\n')
         
+        PRIVATE METHOD
+        
+        
+        Normaliza un plan de [resolve] a {columna : (source, steps, dropna)}.
+        """
+        
+        steps = {}
+        for column, spec in plan.items():
+            if not isinstance(spec, dict):
+                spec = {'steps' : spec}
+            chain = spec['steps']
+            if isinstance(chain, tuple):
+                chain = [chain]
+            steps[column] = (spec.get('source', column), [tuple(step) for step in chain], spec.get('dropna', False))
+        return steps
+    
+    def _flattenExpanded(self, df, fields):
+        """
+        
+        PRIVATE METHOD
+        
+        
+        IGDB devuelve los campos expandidos ('genres.name') como diccionarios {'id', 'name'} dentro de la columna
+        'genres'. Si de una columna se ha pedido un único campo expandido, se sustituye cada diccionario por el valor
+        de ese campo, igual que haría [resolve] (np.nan si no está). Las columnas quedan en el orden en que se pidieron.
+        """
+        
+        if fields.strip() == '*':
+            return df
+        
+        paths = {}
+        for field in fields.split(','):
+            column, _, path = field.strip().partition('.')
+            if path:
+                paths.setdefault(column, []).append(path.split('.'))
+        
+        def leaf(value, path):
+            for key in path:
+                value = value.get(key, np.nan) if isinstance(value, dict) else np.nan
+            return value
+        
+        for column, (path, *others) in paths.items():
+            if others or column not in df.columns:
+                continue
+            with _pausedGC():
+                df[column] = [[leaf(value, path) for value in cell] if isinstance(cell, list) else (leaf(cell, path) if isinstance(cell, dict) else cell)
+                              for cell in df[column].tolist()]
+        
+        #Las filas sin un campo no lo incluyen, así que el orden de pd.DataFrame depende de la primera fila
+        requested = list(dict.fromkeys(['id'] + [field.strip().split('.')[0] for field in fields.split(',')]))
+        return df[[column for column in requested if column in df.columns] + [column for column in df.columns if column not in requested]]
+    
+    def _transformedChunks(self, chunks, steps, processes = 1):
+        """
+        
+        PRIVATE METHOD
+
+        
+        Aplica [steps] a cada bloque de [chunks] y devuelve los bloques en orden, en este proceso o repartidos en un
+        pool de [processes] procesos. Como mucho hay 2 * [processes] bloques en vuelo, así no se lee [chunks] entero.
+        """
+        global _chunkTask
+        
+        chunks = iter(chunks)
+        if processes <= 1:
+            for chunk in chunks:
+                yield self._transformChunk(chunk, steps)
+            return
+        
+        first = next(chunks, None)
+        if first is None:
+            return
+        yield self._transformChunk(first, steps)
+        
+        #fork solo copia el hilo que lo llama: el hilo del registro (EventLog) se para antes, escribiendo lo pendiente,
+        #para que los procesos no hereden su lock tomado ni su archivo con datos en el buffer. Vuelve a arrancar
+        #solo con el siguiente evento
+        self.events.close()
+        
+        _chunkTask = (self, steps)
+        pending = deque()
+        try:
+            with multiprocessing.get_context('fork').Pool(processes) as pool:
+                for chunk in chunks:
+                    pending.append(pool.apply_async(_transformTask, (chunk,)))
+                    if len(pending) >= 2 * processes:
+                        yield pending.popleft().get()
+                while pending:
+                    yield pending.popleft().get()
+        finally:
+            _chunkTask = None
+    
+    def _transformChunk(self, chunk, steps):
+        """
+        
+        PRIVATE METHOD
+
+        
+        """
+        self.main = chunk
+        for step in steps:
+            result = step(self)
+            if isinstance(result, pd.DataFrame):
+                self.main = result
+        chunk, self.main = self.main, None
+        return chunk
+    
     def _replaceIds(self, main_df, main_column, foreign_df, foreign_column, accessColumn):
         """
         
@@ -305,46 +1288,172 @@ class Data:
         """
         df = main_df
 
-        id_field_dict = self._getIdFieldDict(foreign_df, accessColumn, foreign_column)
-
-        def replace(ids):
-            def toInt(content):
-                try:
-                    return int(content)
-                except ValueError:
-                    return content
+        keys, values = self._getLookup(foreign_df, accessColumn, foreign_column)
             
-            if isinstance(ids, (list, np.ndarray)):
-                return [id_field_dict.get(toInt(id_), np.nan) for id_ in ids]
-            elif ids is np.NaN:
-                return ids
-            return id_field_dict.get(toInt(ids), np.nan)
+        if self._isStr(df[main_column]):
+            df[main_column] = parseStrColumn(df[main_column], parser = self._parseStr)
+
+        df[main_column] = self._resolveIds(df[main_column], keys, values)
+    
+    def _parseStr(self, s):
+        """
+        
+        PRIVATE METHOD
+        
+        
+        Convierte una celda leída de un csv a su tipo original (lista, int, float o str).
+        """
         
-        def parseStr(s):
-            if pd.isna(s):
-                return s
+        if pd.isna(s):
+            return s
 
-            try:
-                return ast.literal_eval(s)
-            except (ValueError, SyntaxError, TypeError):
-                pass
+        try:
+            return ast.literal_eval(s)
+        except (ValueError, SyntaxError, TypeError):
+            pass
 
-            try:
-                return int(s)
-            except ValueError:
-                pass
+        try:
+            return int(s)
+        except ValueError:
+            pass
 
-            try:
-                return float(s)
-            except ValueError:
-                pass
+        try:
+            return float(s)
+        except ValueError:
+            pass
 
-            return s
+        return s
+    
+    def _resolveIds(self, series, keys, values):
+        """
+        
+        PRIVATE METHOD
+        
+        
+        Versión vectorizada del antiguo [replace] de [_replaceIds]. Aplana todas las listas de la columna en un
+        único array de id's, los busca de una vez con [keys].get_indexer y vuelve a agrupar los resultados por
+        fila. Los id's que no están en [keys] pasan a np.nan y los np.nan de la columna se mantienen.
+        """
+        
+        return self._chainIds(self._explodeIds(series), [(keys, values)], index = series.index, name = series.name)
+    
+    def _explodeIds(self, series):
+        """
+        
+        PRIVATE METHOD
+        
+        
+        Separa la columna en celdas con listas y celdas escalares (no nulas) y aplana todas las listas en un
+        único array. Devuelve (cells, isList, isScalar, lengths, listIds, scalarIds).
+        """
+        
+        cells = series.to_numpy(dtype = object)
+        isList = np.fromiter(map(isinstance, cells, itertools.repeat((list, np.ndarray))), dtype = bool, count = len(cells))
+        #pd.isna solo sobre las celdas que no son listas, que en las columnas de listas son pocas
+        isScalar = ~isList
+        isScalar[isScalar] = ~pd.isna(cells[isScalar])
+        
+        lists = cells[isList]
+        lengths = np.fromiter(map(len, lists), dtype = np.int64, count = len(lists))
+        total = int(lengths.sum())
+        
+        try:
+            #Listas de enteros (lo normal en IGDB): se aplanan directamente a int64, sin objetos intermedios.
+            #Los float y las cadenas numéricas se convierten igual que con int()
+            listIds = np.fromiter(itertools.chain.from_iterable(lists), dtype = np.int64, count = total)
+        except (TypeError, ValueError, OverflowError):
+            listIds = np.empty(total, dtype = object)
+            listIds[:] = list(itertools.chain.from_iterable(lists))
+        
+        return cells, isList, isScalar, lengths, listIds, cells[isScalar]
+    
+    def _chainIds(self, exploded, lookups, dropna = False, index = None, name = None):
+        """
+        
+        PRIVATE METHOD
+        
+        
+        Pasa los id's aplanados de [exploded] por cada (keys, values) de [lookups] en orden, de forma que la
+        salida de un paso son los id's del siguiente, y vuelve a agrupar por fila una sola vez al final.
+        Con [dropna], tras cada paso intermedio se eliminan de las listas los elementos no encontrados y las
+        listas que quedan vacías pasan a np.nan (como removeNaFromLists + removeEmptyLists).
+        """
+        
+        cells, isList, isScalar, lengths, listIds, scalarIds = exploded
+        empty = None
+        
+        for step, (keys, values) in enumerate(lookups):
+            listIds = self._lookupIds(listIds, keys, values)
+            scalarIds = self._lookupIds(scalarIds, keys, values)
             
-        if self._isStr(df[main_column]):
-            df[main_column] = df[main_column].apply(parseStr)
-
-        df[main_column] = df[main_column].apply(replace)
+            if dropna and step < len(lookups) - 1:
+                keep = ~pd.isna(listIds)
+                segments = np.repeat(np.arange(len(lengths)), lengths)
+                lengths = np.bincount(segments[keep], minlength = len(lengths))
+                listIds = listIds[keep]
+                empty = lengths == 0
+        
+        result = cells.copy()
+        
+        #Reagrupamos por las posiciones originales de cada fila: un slice de la lista aplanada por fila,
+        #directamente en un array de objetos (np.fromiter no intenta convertir las listas en otra dimensión)
+        ends = np.cumsum(lengths)
+        flat = listIds.tolist()
+        with _pausedGC():
+            slices = map(slice, (ends - lengths).tolist(), ends.tolist())
+            result[isList] = np.fromiter(map(flat.__getitem__, slices), dtype = object, count = len(lengths))
+        result[isScalar] = scalarIds
+        
+        if empty is not None:
+            result[np.flatnonzero(isList)[empty]] = np.nan
+        
+        return pd.Series(result, index = index, name = name).infer_objects()
+    
+    def _lookupIds(self, ids, keys, values):
+        """
+        
+        PRIVATE METHOD
+        
+        
+        Busca de una vez todos los [ids] en [keys] y devuelve un array de objetos con los [values]
+        correspondientes, o np.nan donde no se encuentran.
+        """
+        
+        positions = keys.get_indexer(self._toIds(ids))
+        
+        #La posición -1 (no encontrado) cae en el np.nan añadido al final
+        return np.append(values, np.nan)[positions]
+    
+    def _toIds(self, flat):
+        """
+        
+        PRIVATE METHOD
+        
+        
+        Convierte los id's a enteros como hacía [toInt]: los que no se pueden convertir se quedan igual.
+        """
+        
+        ids = np.asarray(flat)
+        if ids.dtype.kind in 'iu':
+            return ids
+        
+        #Números guardados como objetos (por ejemplo la salida de un paso anterior con np.nan)
+        if ids.dtype == object and pd.api.types.infer_dtype(ids, skipna = True) in ('integer', 'floating', 'mixed-integer-float', 'empty'):
+            ids = pd.Series(ids, dtype = object).astype(np.float64).to_numpy()
+        
+        #Los np.nan no coinciden con ninguna clave y el resto se trunca como hacía int()
+        if ids.dtype.kind == 'f':
+            return np.trunc(ids)
+        
+        def toInt(content):
+            try:
+                return int(content)
+            except (ValueError, TypeError):
+                return content
+        
+        ids = np.empty(len(flat), dtype = object)
+        ids[:] = [toInt(id_) for id_ in flat]
+        return ids
 
     def _isStr(self, series):
         """
@@ -353,8 +1462,7 @@ class Data:
 
         
         """
-        cleaned_series = series.dropna()
-        return all(isinstance(element, str) for element in cleaned_series)
+        return pd.api.types.infer_dtype(series, skipna = True) in ('string', 'empty')
     
     def _isInt(self, series):
         """
@@ -386,14 +1494,28 @@ class Data:
         cleaned_series = series.dropna()
         return all(isinstance(element, object) for element in cleaned_series)
 
-    def _getIdFieldDict(self, df, accessColumn, column):
+    def _getLookup(self, df, accessColumn, column):
         """
         
         PRIVATE METHOD
 
         
+        Devuelve un pd.Index con las claves de [accessColumn] y un array con los valores de [column].
+        Si hay claves repetidas se queda con la última, como hacía el antiguo diccionario.
+        Durante [transformChunks] cada índice se calcula una vez y se reutiliza en todos los bloques.
         """
-        return df.set_index(accessColumn)[column].to_dict()
+        
+        key = (id(df), accessColumn, column)
+        if self._lookups is not None and key in self._lookups:
+            return self._lookups[key][1]
+        
+        lookup = df[[accessColumn, column]].dropna(subset = [accessColumn]).drop_duplicates(accessColumn, keep = 'last')
+        lookup = pd.Index(lookup[accessColumn]), lookup[column].to_numpy(dtype = object)
+        
+        if self._lookups is not None:
+            #Se guarda también [df] para que su id no se pueda reutilizar mientras dure la caché
+            self._lookups[key] = (df, lookup)
+        return lookup
     
     def _filter(self, data_frame, column, query_field, query):
         """
@@ -401,13 +1523,47 @@ class Data:
         PRIVATE METHOD
 
         
+        """
+        return self._split(data_frame, column, query_field, [query])
+    
+    def _split(self, data_frame, column, query_field, queries = None):
+        """
+        
+        PRIVATE METHOD
+
+        
+        Versión vectorizada de [_filter] para varias queries a la vez.
         """
         df = data_frame
-        return_column = []
-        for item, queryItem in zip(df[column], df[query_field]):
-            if query == queryItem:
-                return_column.append(item)
-            else:
-                return_column.append(np.nan)
-        df[f'{column}_{query}'] = return_column
-        return df
\ No newline at end of file
+        codes, uniques = pd.factorize(df[query_field])
+        
+        if queries is None:
+            try:
+                queries = sorted(uniques)
+            except TypeError:
+                queries = list(uniques)
+        
+        values = df[column]
+        positions = pd.Index(uniques).get_indexer(queries)
+        for query, position in zip(queries, positions):
+            #Si la query no aparece, position es -1 y ningún código coincide (los np.nan también son -1)
+            mask = codes == position if position >= 0 else np.zeros(len(codes), dtype = bool)
+            split = values.where(mask)
+            #Mismo tipo que asignando una lista de Python: las columnas object se infieren de nuevo, así las que
+            #quedan solo con np.nan (o con números) vuelven a ser float64
+            df[f'{column}_{query}'] = split.infer_objects() if split.dtype == object else split
+        return df
+
+def _transformTask(chunk):
+    #Tarea de los procesos de [Data.transformChunks]: la instancia y los pasos llegan con fork, solo se envía el bloque
+    data, steps = _chunkTask
+    return data._transformChunk(chunk, steps)
+
+def _dateText(dates):
+    #Texto 'mm-dd-YYYY' de una serie datetime64, con np.nan en los NaT. dt.strftime va fila a fila y tarda casi lo
+    #mismo que el apply; aquí se parte de 'YYYY-MM-DD' (np.datetime_as_string) y se reordenan los caracteres
+    days = dates.to_numpy(dtype = 'datetime64[D]')
+    chars = np.datetime_as_string(days).astype('U10').view(np.uint32).reshape(-1, 10)
+    text = np.ascontiguousarray(chars[:, [5, 6, 4, 8, 9, 7, 0, 1, 2, 3]]).view('U10').ravel().astype(object)
+    text[np.isnat(days)] = np.nan
+    return pd.Series(text, index = dates.index, name = dates.name)
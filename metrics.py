@@ -0,0 +1,331 @@
+import atexit
+import json
+import os
+import queue
+import threading
+import numpy as np
+import pandas as pd
+
+from collections import defaultdict
+from contextlib import contextmanager
+from time import monotonic, time
+
+#Cuantiles de las latencias en los resúmenes y en la exportación de Prometheus
+QUANTILES = (0.5, 0.95, 0.99)
+
+class Metrics:
+
+    #Constructor
+    def __init__(self):
+        """
+
+        PUBLIC METHOD
+
+
+        Contadores e histogramas en memoria, thread-safe, identificados por nombre y etiquetas (stage, endpoint...).
+        network.HttpClient registra en los suyos cada request (requests, bytes, latencia, reintentos, espera por el
+        límite de requests y aciertos de la caché) y Data.extract las filas y el tiempo de cada endpoint.
+        """
+
+        self._counters = defaultdict(float)
+        self._histograms = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def inc(self, name, value = 1, **labels):
+        """
+
+        PUBLIC METHOD
+
+
+        Suma [value] al contador [name] con las etiquetas [labels].
+        """
+
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] += value
+
+    def observe(self, name, value, **labels):
+        """
+
+        PUBLIC METHOD
+
+
+        Añade el valor [value] al histograma [name] con las etiquetas [labels].
+        """
+
+        key = (name, _labels(labels))
+        with self._lock:
+            self._histograms[key].append(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """
+
+        PUBLIC METHOD
+
+
+        Suma al contador [name] los segundos que tarda el bloque with.
+        """
+
+        start = monotonic()
+        try:
+            yield
+        finally:
+            self.inc(name, monotonic() - start, **labels)
+
+    def mark(self):
+        """
+
+        PUBLIC METHOD
+
+
+        Marca el estado actual, para poder resumir después solo lo que ha pasado desde entonces ([since]).
+        """
+
+        with self._lock:
+            return dict(self._counters), {key : len(values) for key, values in self._histograms.items()}
+
+    def counters(self, since = None):
+        """
+
+        PUBLIC METHOD
+
+
+        Diccionario (nombre, etiquetas) -> valor de los contadores, desde la marca [since] si se indica.
+        """
+
+        counters, _ = since or ({}, {})
+        with self._lock:
+            values = {key : value - counters.get(key, 0) for key, value in self._counters.items()}
+        return {key : value for key, value in values.items() if value != 0}
+
+    def histograms(self, since = None):
+        """
+
+        PUBLIC METHOD
+
+
+        Diccionario (nombre, etiquetas) -> valores de los histogramas, desde la marca [since] si se indica.
+        """
+
+        _, lengths = since or ({}, {})
+        with self._lock:
+            values = {key : values[lengths.get(key, 0):] for key, values in self._histograms.items()}
+        return {key : values_ for key, values_ in values.items() if values_}
+
+    def summary(self, since = None):
+        """
+
+        PUBLIC METHOD
+
+
+        since: Marca de [mark]. None para resumir todo lo registrado.
+
+        Devuelve un pd.DataFrame con una fila por (stage, endpoint), '*' para lo registrado sin endpoint: requests, MiB recibidos, latencia p50/p95/p99
+        en segundos, reintentos, errores, segundos esperando al límite de requests, aciertos de la caché, filas y filas por segundo.
+        """
+
+        rows = defaultdict(lambda : defaultdict(float))
+        for (name, labels), value in self.counters(since).items():
+            labels = dict(labels)
+            rows[(labels.get('stage'), labels.get('endpoint', '*'))][name] += value
+
+        latencies = defaultdict(list)
+        for (name, labels), values in self.histograms(since).items():
+            if name == 'request_seconds':
+                labels = dict(labels)
+                latencies[(labels.get('stage'), labels.get('endpoint', '*'))].extend(values)
+
+        columns = ['requests', 'MiB', 'p50', 'p95', 'p99', 'retries', 'errors', 'rate_limit_wait', 'cache_hits', 'rows', 'seconds', 'rows_per_second']
+        keys = sorted(set(rows) | set(latencies), key = lambda key : tuple(map(str, key)))
+        records = []
+        for key in keys:
+            counters = rows[key]
+            quantiles = np.quantile(latencies[key], QUANTILES) if latencies[key] else [np.nan] * len(QUANTILES)
+            seconds = counters.get('stage_seconds', np.nan)
+            records.append([counters.get('requests', 0), counters.get('response_bytes', 0) / 2**20, *quantiles,
+                            counters.get('retries', 0), counters.get('errors', 0), counters.get('rate_limit_wait_seconds', 0), counters.get('cache_hits', 0),
+                            counters.get('rows', 0), seconds, counters.get('rows', 0) / seconds if seconds > 0 else np.nan])
+
+        index = pd.MultiIndex.from_tuples(keys, names = ['stage', 'endpoint']) if keys else None
+        summary = pd.DataFrame(records, columns = columns, index = index).round(3)
+        return summary.astype({column : 'int64' for column in ['requests', 'retries', 'errors', 'cache_hits', 'rows']})
+
+    def prometheus(self, namespace = 'igdb'):
+        """
+
+        PUBLIC METHOD
+
+
+        namespace (str): Prefijo de las métricas.
+
+        Exporta las métricas en el formato de texto de Prometheus: los contadores como '{namespace}_{name}_total'
+        y los histogramas como summary (cuantiles, _sum y _count).
+        """
+
+        lines = []
+
+        counters = defaultdict(list)
+        for (name, labels), value in self.counters().items():
+            counters[name].append((labels, value))
+        for name in sorted(counters):
+            metric = f'{namespace}_{name}_total'
+            lines.append(f'# TYPE {metric} counter')
+            lines.extend(f'{metric}{_format(labels)} {value:g}' for labels, value in sorted(counters[name]))
+
+        histograms = defaultdict(list)
+        for (name, labels), values in self.histograms().items():
+            histograms[name].append((labels, values))
+        for name in sorted(histograms):
+            metric = f'{namespace}_{name}'
+            lines.append(f'# TYPE {metric} summary')
+            for labels, values in sorted(histograms[name], key = lambda item : item[0]):
+                for q, value in zip(QUANTILES, np.quantile(values, QUANTILES)):
+                    lines.append(f'{metric}{_format(labels + (("quantile", str(q)),))} {value:g}')
+                lines.append(f'{metric}_sum{_format(labels)} {sum(values):g}')
+                lines.append(f'{metric}_count{_format(labels)} {len(values)}')
+
+        return '\n'.join(lines) + '\n'
+
+    def writePrometheus(self, path, namespace = 'igdb'):
+        """
+
+        PUBLIC METHOD
+
+
+        Escribe [prometheus] en [path] de forma atómica (por ejemplo para el textfile collector de node_exporter).
+        """
+
+        with open(f'{path}.tmp', 'w') as file:
+            file.write(self.prometheus(namespace))
+        os.replace(f'{path}.tmp', path)
+
+    def reset(self):
+        """
+
+        PUBLIC METHOD
+
+
+        Borra todos los contadores e histogramas.
+        """
+
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+class EventLog:
+
+    #Constructor
+    def __init__(self, path = 'logs.jsonl', flush_interval = 1.0, buffer_size = 1000):
+        """
+
+        PUBLIC METHOD
+
+
+        path (str): Archivo JSON-lines donde se añaden los eventos.
+
+        flush_interval (float): Segundos máximos que un evento espera en memoria antes de escribirse.
+
+        buffer_size (int): Eventos que se escriben de una vez como máximo.
+
+        Registro estructurado: cada evento es una línea JSON con su fecha ('ts'), su tipo ('event') y sus campos.
+        [write] solo encola el evento; un hilo en segundo plano los escribe por bloques con el archivo abierto,
+        así registrar una request no bloquea la extracción ni abre el archivo cada vez.
+        """
+
+        self.path = path
+        self.flush_interval = flush_interval
+        self.buffer_size = buffer_size
+
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def write(self, event, **fields):
+        """
+
+        PUBLIC METHOD
+
+
+        Encola un evento [event] con los campos [fields].
+        """
+
+        if self._thread is None:
+            self._start()
+        self._queue.put({'ts' : round(time(), 3), 'event' : event, **fields})
+
+    def flush(self):
+        """
+
+        PUBLIC METHOD
+
+
+        Espera a que estén escritos todos los eventos encolados hasta ahora.
+        """
+
+        if self._thread is not None:
+            done = threading.Event()
+            self._queue.put(done)
+            done.wait()
+
+    def close(self):
+        """
+
+        PUBLIC METHOD
+
+
+        Escribe los eventos pendientes y para el hilo. Se llama sola al salir del proceso.
+        """
+
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target = self._run, name = 'EventLog', daemon = True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _run(self):
+        with open(self.path, 'a') as file:
+            running = True
+            while running:
+                try:
+                    items = [self._queue.get(timeout = self.flush_interval)]
+                except queue.Empty:
+                    continue
+
+                #Se recoge todo lo que ya esté en cola para escribirlo en un solo bloque
+                while len(items) < self.buffer_size:
+                    try:
+                        items.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                lines, flushed = [], []
+                for item in items:
+                    if item is None:
+                        running = False
+                    elif isinstance(item, threading.Event):
+                        flushed.append(item)
+                    else:
+                        lines.append(json.dumps(item, default = str))
+
+                if lines:
+                    file.write('\n'.join(lines) + '\n')
+                file.flush()
+                for done in flushed:
+                    done.set()
+
+def _labels(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items() if value is not None))
+
+def _format(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
@@ -0,0 +1,606 @@
+import json
+import random
+import re
+import threading
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import monotonic, sleep
+from urllib.parse import parse_qs, urlsplit
+
+#Endpoint al que apunta cada campo de referencia, para expandir 'campo.subcampo'
+REFERENCES = {'language' : 'languages'}
+
+def fakeIGDBTables(games = 5000, seed = 0, wide = False):
+    """
+    Genera tablas sintéticas con la misma forma que los endpoints de IGDB usados en el proyecto.
+    Con [wide] los juegos llevan además el resto de campos típicos de 'fields *' (textos, urls, listas de id's...),
+    para que el tamaño de las páginas se parezca al de la API real.
+    """
+
+    rng = random.Random(seed)
+    extra = random.Random(seed + 1)
+    now = 1690000000
+
+    languages = [{'id' : i, 'name' : f'Language {i}', 'updated_at' : now} for i in range(1, 31)]
+    genres = [{'id' : i, 'name' : f'Genre {i}', 'updated_at' : now} for i in range(1, 24)]
+    game_engines = [{'id' : i, 'name' : f'Engine {i}', 'updated_at' : now} for i in range(1, 401)]
+
+    language_supports = []
+    games_ = []
+    for id_ in range(1, games + 1):
+        supports = []
+        for _ in range(rng.randint(0, 4)):
+            support = {'id' : len(language_supports) + 1,
+                       'game' : id_,
+                       'language' : rng.randint(1, 30),
+                       'language_support_type' : rng.randint(1, 3),
+                       'updated_at' : now}
+            language_supports.append(support)
+            supports.append(support['id'])
+
+        game = {'id' : id_,
+                'name' : f'Game {id_}',
+                'category' : rng.choice([0, 0, 0, 0, 1, 2, 3, 4, 5, 8, 9, 11]),
+                'genres' : rng.sample(range(1, 24), rng.randint(1, 3)),
+                'updated_at' : now - rng.randint(0, 10**7)}
+        if supports:
+            game['language_supports'] = supports
+        if rng.random() < 0.3:
+            game['game_engines'] = rng.sample(range(1, 401), rng.randint(1, 2))
+        if rng.random() < 0.9:
+            game['first_release_date'] = rng.randint(315532800, 1690000000)
+        if wide:
+            game.update({'slug' : f'game-{id_}',
+                         'url' : f'https://www.igdb.com/games/game-{id_}',
+                         'checksum' : f'{extra.getrandbits(128):032x}',
+                         'created_at' : now - extra.randint(0, 10**8),
+                         'summary' : ' '.join(extra.choice(['adventure', 'story', 'world', 'player', 'explore', 'battle']) for _ in range(extra.randint(10, 80))),
+                         'cover' : extra.randint(1, 10**6),
+                         'platforms' : extra.sample(range(1, 200), extra.randint(1, 6)),
+                         'similar_games' : extra.sample(range(1, 300000), 10),
+                         'tags' : extra.sample(range(1, 10**6), extra.randint(0, 20)),
+                         'screenshots' : extra.sample(range(1, 10**7), extra.randint(0, 8)),
+                         'rating' : extra.random() * 100,
+                         'rating_count' : extra.randint(0, 2000)})
+            if extra.random() < 0.3:
+                game['storyline'] = ' '.join(extra.choice(['hero', 'kingdom', 'ancient', 'quest']) for _ in range(extra.randint(20, 120)))
+            if extra.random() < 0.5:
+                game['aggregated_rating'] = extra.random() * 100
+        games_.append(game)
+
+    return {'games' : games_,
+            'game_engines' : game_engines,
+            'language_supports' : language_supports,
+            'languages' : languages,
+            'genres' : genres}
+
+class _MockServer:
+
+    #Constructor
+    def __init__(self, latency, rate_limit, max_concurrent, port):
+        """
+
+        PRIVATE METHOD
+
+
+        Base común de los servidores de prueba: servidor HTTP en un hilo propio y límites de uso
+        (token bucket con ráfagas de hasta [rate_limit] y máximo [max_concurrent] requests en vuelo).
+        """
+
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.max_concurrent = max_concurrent
+        self.requests = 0
+        self.rejected = 0
+
+        self._tokens = rate_limit
+        self._updated = monotonic()
+        self._inFlight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target = self._server.serve_forever, daemon = True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _admit(self):
+        """
+
+        PRIVATE METHOD
+
+
+        Aplica los límites: [rate_limit] requests por segundo (ráfagas de hasta [rate_limit]) y [max_concurrent] en vuelo.
+        """
+        with self._lock:
+            now = monotonic()
+            self._tokens = min(self.rate_limit, self._tokens + (now - self._updated) * self.rate_limit)
+            self._updated = now
+            if self._tokens < 1 or self._inFlight >= self.max_concurrent:
+                self.rejected += 1
+                return False
+            self._tokens -= 1
+            self._inFlight += 1
+            self.requests += 1
+            return True
+
+    def _release(self):
+        with self._lock:
+            self._inFlight -= 1
+
+    def _handler(self):
+        raise NotImplementedError
+
+class _Handler(BaseHTTPRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length).decode()
+
+    def _send(self, status, payload):
+        content = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+class MockIGDB(_MockServer):
+
+    #Constructor
+    def __init__(self, tables = None, latency = 0.2, rate_limit = 4, max_concurrent = 8, token_ttl = 5000000, port = 0):
+        """
+
+        PUBLIC METHOD
+
+
+        tables (dict<str, list<dict>>): Datos servidos por endpoint. Por defecto [fakeIGDBTables()].
+
+        latency (float): Segundos de latencia simulada por request.
+
+        rate_limit (int): Requests por segundo permitidas antes de responder 429.
+
+        max_concurrent (int): Requests simultáneas permitidas antes de responder 429.
+
+        token_ttl (float): Segundos de validez de los tokens. Con un token caducado o desconocido se responde 401.
+
+        port (int): Puerto local. 0 para elegir uno libre.
+
+        Servidor HTTP local que imita el endpoint de token de Twitch y los endpoints de IGDB (sintaxis apicalypse),
+        incluyendo sus límites de uso. Se usa como context manager o con [start] y [stop].
+        """
+
+        self.tables = tables if tables is not None else fakeIGDBTables()
+        self.token_ttl = token_ttl
+        self.tokens = {}
+        self._indexes = {}
+        super().__init__(latency, rate_limit, max_concurrent, port)
+
+    @property
+    def base_url(self):
+        return f'{self.url}/v4'
+
+    @property
+    def auth_url(self):
+        return f'{self.url}/oauth2/token'
+
+    def issueToken(self):
+        """
+
+        PUBLIC METHOD
+
+
+        Crea un token nuevo válido durante [token_ttl] segundos.
+        """
+
+        with self._lock:
+            token = f'mock-token-{len(self.tokens) + 1}'
+            self.tokens[token] = monotonic() + self.token_ttl
+        return token
+
+    def validToken(self, authorization):
+        token = (authorization or '').replace('Bearer ', '', 1)
+        return monotonic() < self.tokens.get(token, 0)
+
+    def query(self, endpoint, body):
+        """
+
+        PUBLIC METHOD
+
+
+        endpoint (str): Nombre de la tabla.
+
+        body (str): Query en sintaxis apicalypse (fields, where, sort, limit, offset).
+
+        Ejecuta la query sobre las tablas en memoria y devuelve la lista de filas resultante.
+        """
+
+        clauses = dict(re.findall(r'(fields|where|sort|limit|offset)\s+([^;]*);', body))
+        rows = self._where(self.tables.get(endpoint, []), clauses.get('where'))
+
+        sort = clauses.get('sort')
+        if sort:
+            field, _, order = sort.strip().partition(' ')
+            rows = sorted(rows, key = lambda row : row.get(field, 0), reverse = order.strip() == 'desc')
+
+        offset = int(clauses.get('offset', 0))
+        limit = min(int(clauses.get('limit', 10)), 500)
+        rows = rows[offset : offset + limit]
+
+        fields = clauses.get('fields', '*').strip()
+        if fields != '*':
+            #IGDB siempre devuelve el id aunque no se pida
+            paths = [field.strip().split('.') for field in fields.split(',') if field.strip()]
+            rows = [self._project(row, [['id']] + paths) for row in rows]
+        return rows
+
+    def _index(self, endpoint):
+        #Diccionario id -> fila de cada tabla, creado la primera vez que se expande una referencia a ella
+        if endpoint not in self._indexes:
+            self._indexes[endpoint] = {row['id'] : row for row in self.tables.get(endpoint, [])}
+        return self._indexes[endpoint]
+
+    def _project(self, row, paths):
+        """
+
+        PRIVATE METHOD
+
+
+        Se queda con los campos de [paths] de la fila. Los campos con punto ('genres.name') se expanden: las
+        referencias se sustituyen por las filas referenciadas (con su id y los subcampos pedidos), como en IGDB.
+        """
+
+        result = {}
+        expand = {}
+        for path in paths:
+            if path[0] not in row:
+                continue
+            if len(path) == 1:
+                result[path[0]] = row[path[0]]
+            else:
+                expand.setdefault(path[0], []).append(path[1:])
+
+        for field, subpaths in expand.items():
+            table = self._index(REFERENCES.get(field, field))
+
+            def reference(id_):
+                return self._project(table[id_], [['id']] + subpaths) if id_ in table else id_
+
+            value = row[field]
+            result[field] = [reference(id_) for id_ in value] if isinstance(value, list) else reference(value)
+        return result
+
+    def count(self, endpoint, body):
+        """
+
+        PUBLIC METHOD
+
+
+        Equivalente a /{endpoint}/count: número de filas que cumplen el where de [body].
+        """
+
+        clauses = dict(re.findall(r'(where)\s+([^;]*);', body))
+        return {'count' : len(self._where(self.tables.get(endpoint, []), clauses.get('where')))}
+
+    def multiquery(self, body):
+        """
+
+        PUBLIC METHOD
+
+
+        body (str): Hasta 10 subqueries con la sintaxis de /multiquery: query {endpoint}[/count] "{nombre}" { ... };
+
+        Devuelve [{'name', 'result'}] (o {'name', 'count'} en las subqueries /count) en el orden de las subqueries,
+        o None si hay más de 10.
+        """
+
+        queries = re.findall(r'query\s+(\w+)(/count)?\s+"([^"]*)"\s*\{(.*?)\}\s*;', body, flags = re.S)
+        if len(queries) > 10:
+            return None
+
+        results = []
+        for endpoint, count, name, query in queries:
+            if count:
+                results.append({'name' : name, **self.count(endpoint, query)})
+            else:
+                results.append({'name' : name, 'result' : self.query(endpoint, query)})
+        return results
+
+    def _where(self, rows, where):
+        if where:
+            for condition in where.split('&'):
+                field, op, value = re.match(r'\s*(\w+)\s*(>=|<=|>|<|=)\s*(\S+)\s*', condition).groups()
+                value = float(value)
+                compare = {'>' : lambda a : a > value,
+                           '>=' : lambda a : a >= value,
+                           '<' : lambda a : a < value,
+                           '<=' : lambda a : a <= value,
+                           '=' : lambda a : a == value}[op]
+                rows = [row for row in rows if row.get(field) is not None and compare(row[field])]
+        return rows
+
+    def _handler(self):
+        mock = self
+
+        class Handler(_Handler):
+
+            def do_POST(self):
+                body = self._body()
+
+                if self.path.startswith('/oauth2/token'):
+                    return self._send(200, {'access_token' : mock.issueToken(), 'expires_in' : mock.token_ttl, 'token_type' : 'bearer'})
+
+                if not self.path.startswith('/v4/'):
+                    return self._send(404, {'message' : 'Not found'})
+
+                if not mock.validToken(self.headers.get('Authorization')):
+                    return self._send(401, {'message' : 'Authorization Failure'})
+
+                if not mock._admit():
+                    return self._send(429, {'message' : 'Too Many Requests'})
+                try:
+                    sleep(mock.latency)
+                    endpoint = self.path[4:].strip('/')
+                    if endpoint == 'multiquery':
+                        results = mock.multiquery(body)
+                        if results is None:
+                            return self._send(400, {'title' : 'Syntax Error', 'status' : 400, 'cause' : 'Maximum of 10 queries per multiquery'})
+                        return self._send(200, results)
+                    if endpoint.endswith('/count'):
+                        return self._send(200, mock.count(endpoint[:-len('/count')], body))
+                    self._send(200, mock.query(endpoint, body))
+                finally:
+                    mock._release()
+
+        return Handler
+
+def _airtableFields(fields):
+    #Airtable no guarda los campos vacíos: no aparecen en las respuestas
+    return {field : value for field, value in fields.items() if value not in ('', None)}
+
+class MockAirtable(_MockServer):
+
+    #Constructor
+    def __init__(self, latency = 0.5, rate_limit = 5, max_concurrent = 16, error_rate = 0.0, port = 0, seed = 0):
+        """
+
+        PUBLIC METHOD
+
+
+        latency (float): Segundos de latencia simulada por request.
+
+        rate_limit (int): Requests por segundo por base permitidas antes de responder 429 (Airtable permite 5).
+
+        max_concurrent (int): Requests simultáneas permitidas antes de responder 429.
+
+        error_rate (float): Probabilidad de responder 503 en una request admitida, para probar los reintentos.
+
+        port (int): Puerto local. 0 para elegir uno libre.
+
+        Servidor HTTP local que imita la API REST de Airtable (/v0/{app}/{tabla}). Las tablas se guardan
+        en [tables] como {app : {tabla : {id : record}}}.
+        """
+
+        self.tables = {}
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._ids = 0
+        self._data = threading.RLock()
+        super().__init__(latency, rate_limit, max_concurrent, port)
+
+    @property
+    def base_url(self):
+        return f'{self.url}/v0'
+
+    def records(self, app, tbl):
+        """
+
+        PUBLIC METHOD
+
+
+        Devuelve la lista de records de una tabla, en orden de creación.
+        """
+
+        with self._data:
+            return list(self.tables.get(app, {}).get(tbl, {}).values())
+
+    def create(self, app, tbl, records):
+        """
+
+        PUBLIC METHOD
+
+
+        Crea los records (máximo 10 por request, como Airtable) y los devuelve con su id.
+        """
+
+        table = self.tables.setdefault(app, {}).setdefault(tbl, {})
+        created = []
+        with self._data:
+            for record in records:
+                self._ids += 1
+                record = {'id' : f'rec{self._ids:014d}', 'createdTime' : '2023-01-01T00:00:00.000Z', 'fields' : _airtableFields(record.get('fields', {}))}
+                table[record['id']] = record
+                created.append(record)
+        return created
+
+    def update(self, app, tbl, records, merge_on = None):
+        """
+
+        PUBLIC METHOD
+
+
+        records (list<dict>): Records con 'id', o solo con 'fields' si se usa [merge_on].
+
+        merge_on (list<str>): Campos de performUpsert. Los records sin 'id' se buscan por estos campos:
+                              si no existen se crean, si existe uno se actualiza y si hay varios es un error.
+
+        Actualiza (PATCH, mezclando los campos) los records. Devuelve (records, creados, actualizados),
+        o None si algún record no existe o es ambiguo.
+        """
+
+        with self._data:
+            table = self.tables.setdefault(app, {}).setdefault(tbl, {})
+            result, created, updated = [], [], []
+
+            for record in records:
+                if 'id' in record:
+                    matches = [record['id']] if record['id'] in table else []
+                elif merge_on:
+                    matches = [id_ for id_, existing in table.items() if all(existing['fields'].get(field) == record['fields'].get(field) for field in merge_on)]
+                else:
+                    return None
+
+                if len(matches) > 1 or (not matches and 'id' in record):
+                    return None
+
+                if not matches:
+                    new = self.create(app, tbl, [record])[0]
+                    created.append(new['id'])
+                    result.append(new)
+                    continue
+
+                existing = table[matches[0]]
+                existing['fields'] = _airtableFields({**existing['fields'], **record.get('fields', {})})
+                updated.append(existing['id'])
+                result.append(existing)
+            return result, created, updated
+
+    def delete(self, app, tbl, ids):
+        """
+
+        PUBLIC METHOD
+
+
+        Borra los records [ids]. Devuelve None si alguno no existe.
+        """
+
+        with self._data:
+            table = self.tables.setdefault(app, {}).setdefault(tbl, {})
+            if any(id_ not in table for id_ in ids):
+                return None
+            for id_ in ids:
+                del table[id_]
+            return [{'id' : id_, 'deleted' : True} for id_ in ids]
+
+    def list(self, app, tbl, pageSize = 100, offset = None):
+        """
+
+        PUBLIC METHOD
+
+
+        Página de records de una tabla, con el offset de la siguiente página (None en la última).
+        """
+
+        records = self.records(app, tbl)
+        start = int(offset or 0)
+        end = start + min(int(pageSize), 100)
+        return records[start : end], (str(end) if end < len(records) else None)
+
+    def _handler(self):
+        mock = self
+
+        class Handler(_Handler):
+
+            def _table(self):
+                parts = self.path.split('?')[0].strip('/').split('/')
+                if len(parts) != 3 or parts[0] != 'v0':
+                    return None
+                return parts[1], parts[2]
+
+            def _invalid(self, message):
+                return self._send(422, {'error' : {'type' : 'INVALID_REQUEST_UNKNOWN', 'message' : message}})
+
+            def _serve(self, action):
+                table = self._table()
+                if table is None:
+                    return self._send(404, {'error' : 'NOT_FOUND'})
+
+                if not mock._admit():
+                    return self._send(429, {'errors' : [{'error' : 'RATE_LIMIT_REACHED'}]})
+                try:
+                    sleep(mock.latency)
+                    if mock.error_rate and mock._random.random() < mock.error_rate:
+                        return self._send(503, {'error' : 'SERVICE_UNAVAILABLE'})
+                    action(*table)
+                finally:
+                    mock._release()
+
+            def do_POST(self):
+                body = json.loads(self._body() or '{}')
+
+                def create(app, tbl):
+                    records = body.get('records', [])
+                    if not 0 < len(records) <= 10:
+                        return self._invalid('Must provide between 1 and 10 records')
+                    self._send(200, {'records' : mock.create(app, tbl, records)})
+
+                self._serve(create)
+
+            def do_PATCH(self):
+                body = json.loads(self._body() or '{}')
+
+                def update(app, tbl):
+                    records = body.get('records', [])
+                    if not 0 < len(records) <= 10:
+                        return self._invalid('Must provide between 1 and 10 records')
+
+                    merge_on = body.get('performUpsert', {}).get('fieldsToMergeOn')
+                    result = mock.update(app, tbl, records, merge_on)
+                    if result is None:
+                        return self._invalid('Records not found or ambiguous')
+
+                    records, created, updated = result
+                    payload = {'records' : records}
+                    if merge_on:
+                        payload.update({'createdRecords' : created, 'updatedRecords' : updated})
+                    self._send(200, payload)
+
+                self._serve(update)
+
+            def do_DELETE(self):
+                ids = parse_qs(urlsplit(self.path).query).get('records[]', [])
+
+                def delete(app, tbl):
+                    if not 0 < len(ids) <= 10:
+                        return self._invalid('Must provide between 1 and 10 records')
+
+                    deleted = mock.delete(app, tbl, ids)
+                    if deleted is None:
+                        return self._send(404, {'error' : 'NOT_FOUND'})
+                    self._send(200, {'records' : deleted})
+
+                self._serve(delete)
+
+            def do_GET(self):
+                params = parse_qs(urlsplit(self.path).query)
+
+                def list_(app, tbl):
+                    records, offset = mock.list(app, tbl, params.get('pageSize', [100])[0], params.get('offset', [None])[0])
+                    payload = {'records' : records}
+                    if offset is not None:
+                        payload['offset'] = offset
+                    self._send(200, payload)
+
+                self._serve(list_)
+
+        return Handler
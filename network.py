@@ -0,0 +1,386 @@
+import json
+import requests
+import threading
+
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from time import monotonic, sleep, time
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.exceptions import NewConnectionError
+
+from cache import CacheMiss, ResponseCache
+from metrics import Metrics
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+#Límites de requests por segundo de las APIs (IGDB: 4, Airtable: 5 por base)
+RATE_LIMITS = {'api.igdb.com' : 4, 'api.airtable.com' : 5}
+
+#Respuestas que se reintentan
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+#Métodos que se pueden repetir sin duplicar efectos. El resto solo se reintenta si la request no ha llegado a procesarse
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+
+_DEFAULT_CLIENT = None
+_DEFAULT_LOCK = threading.Lock()
+
+def decodeJSON(content):
+    """
+    Decodifica el cuerpo (bytes) de una respuesta JSON con orjson si está instalado, o con el módulo json si no.
+    """
+
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+class TokenBucket:
+
+    #Constructor
+    def __init__(self, rate, capacity = 1):
+        """
+
+        PUBLIC METHOD
+
+
+        rate (float): Número de tokens (requests) que se reponen por segundo.
+
+        capacity (int): Número máximo de tokens acumulados (ráfaga permitida).
+
+        Limitador de velocidad thread-safe. Cada llamada a [acquire] reserva un token y bloquea el hilo
+        el tiempo necesario para no superar [rate] requests por segundo.
+        """
+
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens = 1, cancel = None):
+        """
+
+        PUBLIC METHOD
+
+
+        tokens (int): Número de tokens que se quieren consumir.
+
+        cancel (threading.Event): Si se activa durante la espera, se deja de esperar.
+
+        Reserva los tokens y espera hasta que estén disponibles. Devuelve los segundos esperados.
+        """
+
+        #La reserva se hace dentro del lock, la espera fuera para no bloquear al resto de hilos
+        with self._lock:
+            now = monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+
+        if wait > 0:
+            if cancel is None:
+                sleep(wait)
+            else:
+                cancel.wait(wait)
+        return wait
+
+class TwitchAuth:
+
+    #Constructor
+    def __init__(self, clientID, clientSecret, auth_url = 'https://id.twitch.tv/oauth2/token', client = None):
+        """
+
+        PUBLIC METHOD
+
+
+        clientID, clientSecret (str): Credenciales de la aplicación de Twitch.
+
+        auth_url (str): Endpoint de tokens de Twitch.
+
+        client (HttpClient): Cliente con el que se piden los tokens. Por defecto [defaultClient()].
+
+        Token de acceso de IGDB (client credentials). Se pide la primera vez que hace falta y se renueva
+        cuando está a punto de caducar o cuando la API responde 401. Si Twitch rechaza las credenciales
+        se lanza la excepción en lugar de seguir con un token vacío.
+        """
+
+        self.clientID = clientID
+        self.clientSecret = clientSecret
+        self.auth_url = auth_url
+        self.client = client
+        self.token = None
+        self._expires = 0
+        self._lock = threading.Lock()
+
+    def headers(self):
+        """
+
+        PUBLIC METHOD
+
+
+        Cabeceras de autenticación de IGDB, renovando el token si hace falta.
+        """
+
+        token = self.token
+        if token is None or monotonic() > self._expires:
+            token = self.refresh(stale = token)
+        return {'Client-ID' : self.clientID,
+                'Authorization' : f'Bearer {token}'}
+
+    def refresh(self, stale = None):
+        """
+
+        PUBLIC METHOD
+
+
+        stale (str): Token que se sabe caducado. Si otro hilo ya lo ha renovado no se vuelve a pedir.
+
+        Pide un token nuevo y lo devuelve.
+        """
+
+        with self._lock:
+            if self.token is not None and self.token != stale and monotonic() <= self._expires:
+                return self.token
+
+            client = self.client or defaultClient()
+            response, _ = client.request('POST', self.auth_url, idempotent = True, stage = 'auth', params = {'client_id' : self.clientID,
+                                                                                             'client_secret' : self.clientSecret,
+                                                                                             'grant_type' : 'client_credentials'})
+            payload = response.json()
+
+            #Se renueva un poco antes de que caduque (un minuto, o un 10% si el token dura poco)
+            expiresIn = payload.get('expires_in', 3600)
+            self.token = payload['access_token']
+            self._expires = monotonic() + expiresIn - min(60, expiresIn * 0.1)
+            return self.token
+
+class HttpClient:
+
+    #Constructor
+    def __init__(self, pool_size = 32, retries = 5, backoff = 0.25, timeout = 60, rate_limits = None, cache = None, metrics = None):
+        """
+
+        PUBLIC METHOD
+
+
+        pool_size (int): Conexiones keep-alive que se mantienen abiertas por host.
+
+        retries (int): Reintentos por request si la respuesta es 429 o 5xx, o si falla la conexión (ver [request]).
+
+        backoff (float): Espera del primer reintento en segundos; se duplica en cada reintento.
+                         Si la respuesta trae la cabecera Retry-After (segundos o fecha HTTP) se espera lo que indique.
+
+        timeout (float): Segundos máximos de espera de cada request.
+
+        rate_limits (dict<str, float>): Requests por segundo por host. Por defecto los límites de IGDB y Airtable.
+
+        cache (cache.ResponseCache): Caché en disco de las respuestas de lectura. None para no usar caché.
+
+        metrics (metrics.Metrics): Donde se registran las requests. Por defecto unas métricas propias del cliente.
+
+        Cliente HTTP compartido por las extracciones de IGDB y las cargas y descargas de Airtable.
+        Reutiliza las conexiones (requests.Session), limita las requests por host con un TokenBucket,
+        reintenta con backoff y renueva el token de Twitch si caduca a mitad de una extracción.
+        """
+
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.cache = cache
+        self.metrics = metrics or Metrics()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections = pool_size, pool_maxsize = pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._buckets = {}
+        self._lock = threading.Lock()
+        for host, rate in (RATE_LIMITS if rate_limits is None else rate_limits).items():
+            self.limit(host, rate)
+
+    def limit(self, url, rate, capacity = 1):
+        """
+
+        PUBLIC METHOD
+
+
+        url (str): Url o host ('api.igdb.com').
+
+        rate (float): Requests por segundo permitidas. None para quitar el límite.
+
+        Fija el límite de requests por segundo del host de [url] y devuelve su TokenBucket. Si el host ya tenía
+        el mismo límite se reutiliza el bucket, así varias llamadas simultáneas comparten el mismo límite.
+        """
+
+        host = _host(url)
+        with self._lock:
+            if rate is None:
+                self._buckets.pop(host, None)
+                return None
+
+            bucket = self._buckets.get(host)
+            if bucket is None or bucket.rate != rate or bucket.capacity != capacity:
+                bucket = self._buckets[host] = TokenBucket(rate, capacity)
+            return bucket
+
+    def request(self, method, url, auth = None, retries = None, cancel = None, cacheable = None, idempotent = None, stage = None, **kwargs):
+        """
+
+        PUBLIC METHOD
+
+
+        method (str): Método HTTP.
+
+        url (str): Url de la request.
+
+        auth (TwitchAuth): Autenticación que añade sus cabeceras y se renueva si la respuesta es 401.
+
+        retries (int): Reintentos. Por defecto los del cliente.
+
+        cancel (threading.Event): Si se activa mientras se espera turno o un reintento, no se envía la request.
+
+        cacheable (bool): Si la respuesta se puede guardar en [cache]. Por defecto solo las GET.
+
+        idempotent (bool): Si la request se puede repetir sin duplicar efectos. Por defecto según el método
+                           (IDEMPOTENT_METHODS); las queries de IGDB, por ejemplo, son POST de lectura y se marcan.
+                           Las no idempotentes (crear records en Airtable) solo se reintentan con 429 o si la request
+                           no llegó a enviarse (timeout al conectar o conexión rechazada), nunca con 5xx, timeouts de
+                           lectura ni conexiones cortadas, porque el servidor puede haber guardado ya la escritura.
+
+        stage (str): Etapa a la que se atribuye la request en [metrics] ('extract', 'airtable_load'...).
+
+        kwargs: Argumentos de requests (headers, params, data, json...).
+
+        Devuelve la respuesta y su tiempo de respuesta, o (None, 0) si se ha cancelado.
+        Si después de los reintentos la respuesta sigue siendo un error, se lanza requests.HTTPError.
+        Las respuestas servidas desde la caché no esperan turno ni necesitan token, y su tiempo de respuesta es 0.
+        Cada intento queda registrado en [metrics] con las etiquetas stage y endpoint (ruta de la url).
+        """
+
+        if cancel is not None and cancel.is_set():
+            return None, 0
+
+        metrics = self.metrics
+        labels = {'stage' : stage, 'endpoint' : urlsplit(url).path or '/'}
+
+        key = None
+        if self.cache is not None and (method.upper() == 'GET' if cacheable is None else cacheable):
+            key = ResponseCache.key(method, url, kwargs.get('params'), kwargs.get('data'), kwargs.get('json'))
+            content = self.cache.get(key)
+            if content is not None:
+                metrics.inc('cache_hits', **labels)
+                return _cachedResponse(url, content), 0
+            if self.cache.offline:
+                raise CacheMiss(f'{method} {url} is not cached (offline mode)')
+
+        retries = self.retries if retries is None else retries
+        idempotent = method.upper() in IDEMPOTENT_METHODS if idempotent is None else idempotent
+        bucket = self._buckets.get(_host(url))
+        headers = kwargs.pop('headers', None) or {}
+        kwargs.setdefault('timeout', self.timeout)
+
+        for attempt in range(retries + 1):
+            if bucket is not None:
+                metrics.inc('rate_limit_wait_seconds', bucket.acquire(cancel = cancel), **labels)
+            if cancel is not None and cancel.is_set():
+                return None, 0
+            if attempt > 0:
+                metrics.inc('retries', **labels)
+
+            authHeaders = auth.headers() if auth is not None else {}
+            token = auth.token if auth is not None else None
+
+            start = time()
+            try:
+                response = self.session.request(method, url, headers = {**headers, **authHeaders}, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as error:
+                metrics.inc('errors', **labels)
+                if attempt == retries or (not idempotent and not _neverSent(error)):
+                    raise
+                self._wait(self.backoff * 2 ** attempt, cancel)
+                continue
+            responseTime = time() - start
+
+            metrics.inc('requests', **labels)
+            metrics.inc('response_bytes', len(response.content), **labels)
+            metrics.observe('request_seconds', responseTime, **labels)
+            if response.status_code >= 400:
+                metrics.inc('errors', status = response.status_code, **labels)
+
+            if response.status_code == 401 and auth is not None and attempt < retries:
+                auth.refresh(stale = token)
+                continue
+
+            if response.status_code not in RETRY_STATUS or (not idempotent and response.status_code != 429):
+                break
+            if attempt < retries:
+                wait = _retryAfter(response.headers.get('Retry-After'))
+                self._wait(self.backoff * 2 ** attempt if wait is None else wait, cancel)
+
+        response.raise_for_status()
+
+        if key is not None and response.status_code == 200:
+            self.cache.put(key, response.content)
+        return response, responseTime
+
+    def _wait(self, seconds, cancel = None):
+        if cancel is None:
+            sleep(seconds)
+        else:
+            cancel.wait(seconds)
+
+def defaultClient():
+    """
+    Cliente HTTP compartido por todo el proceso. Se crea la primera vez que se usa.
+    """
+
+    global _DEFAULT_CLIENT
+    with _DEFAULT_LOCK:
+        if _DEFAULT_CLIENT is None:
+            _DEFAULT_CLIENT = HttpClient()
+        return _DEFAULT_CLIENT
+
+def _neverSent(error):
+    #True si el error es de antes de enviar la request (timeout al conectar o conexión rechazada), así que
+    #repetirla no puede duplicar una escritura. requests envuelve el NewConnectionError en un MaxRetryError.
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = error.args[0] if error.args else None
+    return isinstance(getattr(reason, 'reason', reason), NewConnectionError)
+
+def _retryAfter(value):
+    #Segundos que pide esperar la cabecera Retry-After, en segundos ('120') o como fecha HTTP
+    #('Wed, 21 Oct 2015 07:28:00 GMT'). None si no está o no se entiende, para usar el backoff.
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo = timezone.utc)
+    return max(0.0, (date - datetime.now(timezone.utc)).total_seconds())
+
+def _cachedResponse(url, content):
+    #Respuesta equivalente a la original a partir del cuerpo guardado
+    response = requests.Response()
+    response.status_code = 200
+    response._content = content
+    response.headers = CaseInsensitiveDict({'Content-Type' : 'application/json', 'X-Cache' : 'HIT'})
+    response.url = url
+    response.encoding = 'utf-8'
+    return response
+
+def _host(url):
+    return urlsplit(url).netloc or url
@@ -0,0 +1,259 @@
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import tracemalloc
+import pandas as pd
+
+from contextlib import contextmanager
+from datetime import datetime
+from time import perf_counter, process_time
+
+class Profiler:
+
+    #Constructor
+    def __init__(self):
+        """
+
+        PUBLIC METHOD
+
+
+        Perfilado opcional del ETL. Mientras está activo ([enable]), cada llamada a una función marcada con
+        [profiled] o cada bloque [stage] guarda su tiempo real, su tiempo de CPU y, si se pide, el pico de memoria
+        reservada durante la llamada (tracemalloc). Una de las etapas se puede perfilar además con cProfile.
+        Desactivado, cada función marcada solo comprueba un booleano.
+
+        Pensado para el hilo principal: las etapas se anidan en una sola pila.
+        """
+
+        self.enabled = False
+        self.memory = False
+        self.cprofile = None
+        self.directory = 'profiles'
+        self.records = []
+
+        self._stack = []
+        self._profiles = {}
+        self._tracing = False
+        self._lock = threading.RLock()
+
+    def enable(self, memory = True, cprofile = None, directory = 'profiles'):
+        """
+
+        PUBLIC METHOD
+
+
+        memory (bool): Mide el pico de memoria de cada etapa con tracemalloc (hace el código más lento).
+
+        cprofile (str): Nombre de la etapa que se perfila con cProfile. Su salida, acumulada entre todas las llamadas,
+                        va a {directory}/{etapa}.prof y un resumen por tiempo acumulado a {directory}/{etapa}.txt.
+
+        directory (str): Carpeta de las salidas de cProfile y de [write].
+
+        Activa el perfilado.
+        """
+
+        self.enabled = True
+        self.memory = memory
+        self.cprofile = cprofile
+        self.directory = directory
+
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        return self
+
+    def disable(self):
+        """
+
+        PUBLIC METHOD
+
+
+        Desactiva el perfilado. Los registros se mantienen hasta [reset].
+        """
+
+        self.enabled = False
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+    def reset(self):
+        """
+
+        PUBLIC METHOD
+
+
+        Borra los registros y los perfiles de cProfile acumulados.
+        """
+
+        with self._lock:
+            self.records = []
+            self._profiles = {}
+
+    @contextmanager
+    def stage(self, name):
+        """
+
+        PUBLIC METHOD
+
+
+        name (str): Nombre de la etapa.
+
+        Mide el bloque with como una etapa. Sirve para los pasos que no son funciones, por ejemplo en el notebook:
+
+            with profiler.stage('dates'):
+                df['first_release_date'] = pd.to_datetime(df['first_release_date'], unit = 's')
+        """
+
+        if not self.enabled:
+            yield
+            return
+
+        memory = self.memory and tracemalloc.is_tracing()
+        with self._lock:
+            if memory:
+                #El pico de la etapa que empieza no debe borrar el de las etapas que la contienen
+                current, peak = tracemalloc.get_traced_memory()
+                for frame in self._stack:
+                    frame['peak'] = max(frame['peak'], peak)
+                tracemalloc.reset_peak()
+            frame = {'name' : name, 'memory' : tracemalloc.get_traced_memory()[0] if memory else 0, 'peak' : 0}
+            self._stack.append(frame)
+
+        profile = self._profiles.setdefault(name, cProfile.Profile()) if name == self.cprofile else None
+        start, cpu = perf_counter(), process_time()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+            wall, cpu = perf_counter() - start, process_time() - cpu
+
+            with self._lock:
+                self._stack.remove(frame)
+                if memory:
+                    _, peak = tracemalloc.get_traced_memory()
+                    frame['peak'] = max(frame['peak'], peak)
+                    for outer in self._stack:
+                        outer['peak'] = max(outer['peak'], frame['peak'])
+
+                self.records.append({'stage' : name,
+                                     'depth' : len(self._stack),
+                                     'wall' : wall,
+                                     'cpu' : cpu,
+                                     'peak_MiB' : (frame['peak'] - frame['memory']) / 2**20 if memory else None})
+
+            if profile is not None:
+                self._dump(name, profile)
+
+    def report(self):
+        """
+
+        PUBLIC METHOD
+
+
+        Devuelve un pd.DataFrame con una fila por etapa: llamadas, tiempo real y de CPU (total y medio, en segundos)
+        y el mayor pico de memoria de sus llamadas, ordenado por tiempo real total.
+        """
+
+        columns = ['calls', 'wall', 'wall_mean', 'cpu', 'cpu_mean', 'peak_MiB']
+        with self._lock:
+            records = pd.DataFrame(self.records, columns = ['stage', 'depth', 'wall', 'cpu', 'peak_MiB'])
+        if records.empty:
+            return pd.DataFrame(columns = columns, index = pd.Index([], name = 'stage'))
+
+        grouped = records.groupby('stage', sort = False)
+        report = pd.DataFrame({'calls' : grouped.size(),
+                               'wall' : grouped['wall'].sum(),
+                               'wall_mean' : grouped['wall'].mean(),
+                               'cpu' : grouped['cpu'].sum(),
+                               'cpu_mean' : grouped['cpu'].mean(),
+                               'peak_MiB' : grouped['peak_MiB'].max()})
+        return report.sort_values('wall', ascending = False).round(4)
+
+    def write(self, path = None):
+        """
+
+        PUBLIC METHOD
+
+
+        path (str): Archivo JSON del informe. Por defecto {directory}/profile_{fecha}.json.
+
+        Escribe el informe de esta ejecución (el resumen de [report] y todas las llamadas) y devuelve su ruta.
+        """
+
+        if path is None:
+            os.makedirs(self.directory, exist_ok = True)
+            path = os.path.join(self.directory, f'profile_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json')
+
+        report = self.report()
+        with self._lock:
+            calls = list(self.records)
+        content = {'created' : datetime.now().isoformat(timespec = 'seconds'),
+                   'stages' : json.loads(report.to_json(orient = 'index')),
+                   'calls' : calls}
+
+        with open(f'{path}.tmp', 'w') as file:
+            json.dump(content, file, indent = 4)
+        os.replace(f'{path}.tmp', path)
+        return path
+
+    def compare(self, baseline, threshold = 1.2):
+        """
+
+        PUBLIC METHOD
+
+
+        baseline (str): Informe de una ejecución anterior escrito con [write].
+
+        threshold (float): Ratio de tiempo real a partir del cual una etapa se marca como regresión.
+
+        Compara el tiempo real medio y el pico de memoria de cada etapa con los del informe [baseline].
+        """
+
+        with open(baseline) as file:
+            previous = pd.DataFrame.from_dict(json.load(file)['stages'], orient = 'index')
+
+        current = self.report()
+        comparison = pd.DataFrame({'wall_mean' : current['wall_mean'],
+                                   'baseline_wall_mean' : previous['wall_mean'],
+                                   'peak_MiB' : current['peak_MiB'],
+                                   'baseline_peak_MiB' : previous['peak_MiB']})
+        comparison['ratio'] = comparison['wall_mean'] / comparison['baseline_wall_mean']
+        comparison['regression'] = comparison['ratio'] > threshold
+        return comparison.sort_values('ratio', ascending = False).round(4)
+
+    def _dump(self, name, profile):
+        os.makedirs(self.directory, exist_ok = True)
+        profile.dump_stats(os.path.join(self.directory, f'{name}.prof'))
+
+        stream = io.StringIO()
+        pstats.Stats(profile, stream = stream).sort_stats('cumulative').print_stats(40)
+        with open(os.path.join(self.directory, f'{name}.txt'), 'w') as file:
+            file.write(stream.getvalue())
+
+#Perfilador compartido por Data, util y visualization
+profiler = Profiler()
+
+def profiled(name = None):
+    """
+    Decorador que mide cada llamada a la función como una etapa de [profiler] (por defecto con el nombre
+    de la función, o Clase.método). Si el perfilado no está activo se llama directamente a la función.
+    """
+
+    def decorator(func):
+        stage = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            with profiler.stage(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,201 @@
+import json
+import os
+import threading
+
+from datetime import datetime
+
+from network import decodeJSON
+from storage import FrameBuilder
+
+class ExtractState:
+
+    #Constructor
+    def __init__(self, path = 'extract_state.json'):
+        """
+
+        PUBLIC METHOD
+
+
+        path (str): Ruta del manifiesto JSON.
+
+        Guarda por endpoint las marcas de agua (máximo 'updated_at' e 'id' vistos) de la última extracción,
+        para que las siguientes extracciones puedan pedir solamente lo que ha cambiado desde entonces.
+        """
+
+        self.path = path
+        self.endpoints = {}
+
+        if os.path.exists(path):
+            with open(path) as file:
+                self.endpoints = json.load(file)
+
+    def __getitem__(self, endpoint):
+        return self.endpoints[endpoint]
+
+    def __contains__(self, endpoint):
+        return endpoint in self.endpoints
+
+    def get(self, endpoint, default = None):
+        return self.endpoints.get(endpoint, default)
+
+    def update(self, endpoint, data_frame):
+        """
+
+        PUBLIC METHOD
+
+
+        endpoint (str): Nombre del endpoint.
+
+        data_frame (pd.DataFrame): Filas extraídas (o el resultado ya combinado) del endpoint.
+
+        Actualiza las marcas del endpoint con los máximos de 'updated_at' e 'id' y guarda el manifiesto.
+        Las marcas nunca retroceden.
+        """
+
+        marks = dict(self.endpoints.get(endpoint, {}))
+
+        for column in ['updated_at', 'id']:
+            if column in data_frame.columns and data_frame[column].notna().any():
+                value = int(data_frame[column].max())
+                marks[column] = max(value, marks.get(column, value))
+
+        marks['rows'] = int(data_frame.shape[0])
+        marks['last_run'] = datetime.now().isoformat(timespec = 'seconds')
+
+        self.endpoints[endpoint] = marks
+        self.save()
+
+    def save(self):
+        """
+
+        PUBLIC METHOD
+
+
+        Escribe el manifiesto de forma atómica (archivo temporal + os.replace).
+        """
+
+        tmp = f'{self.path}.tmp'
+        with open(tmp, 'w') as file:
+            json.dump(self.endpoints, file, indent = 4)
+        os.replace(tmp, self.path)
+
+class PageSpill:
+
+    #Constructor
+    def __init__(self, directory, endpoint, signature, resume = False):
+        """
+
+        PUBLIC METHOD
+
+
+        directory (str): Carpeta base donde se guardan las páginas.
+
+        endpoint (str): Nombre del endpoint. Las páginas van a {directory}/{endpoint}/.
+
+        signature (dict): Parámetros de la extracción (fields, batchSize, paginación...). Solo se reanuda
+                          si coinciden con los del checkpoint.
+
+        resume (bool): Reanuda desde el checkpoint. Si es False, o no coincide la firma, se empieza de cero.
+
+        Vuelca a disco cada página extraída como un archivo JSONL y mantiene un checkpoint (checkpoint.json)
+        con el último offset o cursor completado, para poder reanudar una extracción interrumpida.
+        """
+
+        self.directory = os.path.join(directory, endpoint)
+        self.checkpoint = {}
+        self.rows = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(self.directory, exist_ok = True)
+
+        path = os.path.join(self.directory, 'checkpoint.json')
+        if resume and os.path.exists(path):
+            with open(path) as file:
+                self.checkpoint = json.load(file)
+
+        if self.checkpoint.get('signature') != signature:
+            self.clear()
+            self.checkpoint = {'signature' : signature}
+            self._save()
+
+    def get(self, key, default = None):
+        return self.checkpoint.get(key, default)
+
+    def write(self, name, page, key, value):
+        """
+
+        PUBLIC METHOD
+
+
+        name (str): Nombre de la página. El orden alfabético de los nombres es el orden de las filas.
+
+        page (list<dict>): Filas de la página.
+
+        key, value: Entrada del checkpoint que queda completada con esta página.
+
+        Escribe la página de forma atómica y después actualiza el checkpoint. Si se corta entre los dos pasos,
+        al reanudar simplemente se vuelve a pedir y sobrescribir la misma página.
+        """
+
+        path = os.path.join(self.directory, f'{name}.jsonl')
+        with open(f'{path}.tmp', 'w') as file:
+            for row in page:
+                file.write(json.dumps(row))
+                file.write('\n')
+        os.replace(f'{path}.tmp', path)
+
+        with self._lock:
+            self.rows += len(page)
+        self.mark(key, value)
+
+    def mark(self, key, value):
+        """
+
+        PUBLIC METHOD
+
+
+        Actualiza una entrada del checkpoint y lo guarda.
+        """
+
+        with self._lock:
+            self.checkpoint[key] = value
+            self._save()
+
+    def frame(self):
+        """
+
+        PUBLIC METHOD
+
+
+        Construye un pd.DataFrame a partir de las páginas en disco, página a página, sin mantener
+        todos los diccionarios en memoria a la vez.
+        """
+
+        builder = FrameBuilder()
+        for name in self._pages():
+            with open(os.path.join(self.directory, name), 'rb') as file:
+                builder.append([decodeJSON(line) for line in file])
+        return builder.frame()
+
+    def clear(self):
+        """
+
+        PUBLIC METHOD
+
+
+        Borra las páginas y el checkpoint del endpoint.
+        """
+
+        for name in self._pages() + ['checkpoint.json']:
+            path = os.path.join(self.directory, name)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _pages(self):
+        return sorted(name for name in os.listdir(self.directory) if name.endswith('.jsonl'))
+
+    def _save(self):
+        path = os.path.join(self.directory, 'checkpoint.json')
+        with open(f'{path}.tmp', 'w') as file:
+            json.dump(self.checkpoint, file, indent = 4)
+        os.replace(f'{path}.tmp', path)
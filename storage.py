@@ -0,0 +1,293 @@
+import os
+import numpy as np
+import pandas as pd
+
+from util import _pausedGC
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+FORMATS = {'csv' : 'csv', 'parquet' : 'parquet', 'feather' : 'feather'}
+
+class FrameBuilder:
+
+    #Constructor
+    def __init__(self):
+        """
+
+        PUBLIC METHOD
+
+
+        Construye un pd.DataFrame página a página. Cada página (lista de diccionarios) se convierte en un DataFrame
+        pequeño nada más llegar, así los diccionarios se liberan enseguida (en lugar de acumular todos hasta el final)
+        y el trabajo se reparte mientras se esperan las siguientes páginas. [frame] concatena las páginas una sola vez.
+        El resultado es el mismo que pd.DataFrame con todas las filas.
+        """
+
+        self.frames = []
+        self.rows = 0
+
+    def __len__(self):
+        return self.rows
+
+    def append(self, page):
+        """
+
+        PUBLIC METHOD
+
+
+        Añade una página de filas.
+        """
+
+        if len(page) > 0:
+            with _pausedGC():
+                self.frames.append(pd.DataFrame(page))
+            self.rows += len(page)
+
+    def extend(self, other):
+        """
+
+        PUBLIC METHOD
+
+
+        Añade las páginas de otro FrameBuilder, a continuación de las propias.
+        """
+
+        self.frames.extend(other.frames)
+        self.rows += other.rows
+
+    def frame(self):
+        """
+
+        PUBLIC METHOD
+
+
+        Devuelve el pd.DataFrame con todas las páginas en orden.
+        """
+
+        if not self.frames:
+            return pd.DataFrame()
+        if len(self.frames) == 1:
+            return self.frames[0]
+        return pd.concat(self.frames, ignore_index = True)
+
+def framePath(name, format = 'parquet', directory = ''):
+    """
+    Ruta del archivo de un endpoint: {directory}/{name}_data.{extensión}.
+    """
+
+    if format not in FORMATS:
+        raise ValueError(f"Unknown format '{format}', must be one of {list(FORMATS)}!")
+    return os.path.join(directory, f'{name}_data.{FORMATS[format]}')
+
+def findFrame(name, directory = ''):
+    """
+    Devuelve la ruta y el formato del archivo guardado de un endpoint, o (None, None) si no existe.
+    Si hay varios, se prefieren los formatos columnares.
+    """
+
+    for format in ['parquet', 'feather', 'csv']:
+        path = framePath(name, format, directory)
+        if os.path.exists(path):
+            return path, format
+    return None, None
+
+def frameFormat(path):
+    """
+    Deduce el formato a partir de la extensión del archivo.
+    """
+
+    extension = os.path.splitext(path)[1].lstrip('.')
+    for format, ext in FORMATS.items():
+        if ext == extension:
+            return format
+    raise ValueError(f"Unknown file extension '{extension}' in '{path}'!")
+
+def saveFrame(data_frame, path, format = None):
+    """
+    Guarda un pd.DataFrame en csv, parquet o feather. En los formatos columnares las columnas de listas
+    se guardan como listas nativas de Arrow, así que no hace falta volver a parsearlas al leer.
+    """
+
+    format = format or frameFormat(path)
+
+    if format == 'csv':
+        data_frame.to_csv(path)
+        return path
+
+    table = _toArrow(data_frame)
+    if format == 'parquet':
+        pq.write_table(table, path)
+    else:
+        feather.write_feather(table, path)
+    return path
+
+def loadFrame(path, columns = None):
+    """
+    Lee un pd.DataFrame guardado con [saveFrame]. [columns] permite leer solamente algunas columnas
+    (proyección), que en parquet y feather evita incluso leer el resto del disco.
+    Las listas se devuelven como listas de Python y los nulos como np.nan, igual que tras una extracción.
+    """
+
+    format = frameFormat(path)
+
+    if format == 'csv':
+        if columns is None:
+            return pd.read_csv(path)
+        return pd.read_csv(path, usecols = lambda column : column in columns)[columns]
+
+    _requireArrow()
+    if format == 'parquet':
+        table = pq.read_table(path, columns = columns)
+    else:
+        table = feather.read_table(path, columns = columns)
+    return _fromArrow(table)
+
+def iterFrames(path, chunk_size = 100000, columns = None):
+    """
+    Lee un archivo de [saveFrame] por bloques de [chunk_size] filas, sin cargarlo entero. Cada bloque es un
+    pd.DataFrame igual que el trozo correspondiente de [loadFrame], con el índice de sus filas en el archivo.
+    """
+
+    format = frameFormat(path)
+
+    if format == 'csv':
+        usecols = None if columns is None else (lambda column : column in columns)
+        for chunk in pd.read_csv(path, chunksize = chunk_size, usecols = usecols):
+            yield chunk if columns is None else chunk[columns]
+        return
+
+    _requireArrow()
+    start = 0
+    if format == 'parquet':
+        batches = pq.ParquetFile(path).iter_batches(batch_size = chunk_size, columns = columns)
+    else:
+        #Feather (Arrow IPC) se lee con memory map, así solo se copian las filas de cada bloque
+        table = feather.read_table(path, columns = columns, memory_map = True)
+        batches = table.to_batches(max_chunksize = chunk_size)
+
+    for batch in batches:
+        chunk = _fromArrow(pa.Table.from_batches([batch]))
+        chunk.index = pd.RangeIndex(start, start + len(chunk))
+        start += len(chunk)
+        yield chunk
+
+class FrameWriter:
+
+    #Constructor
+    def __init__(self, path, format = None, schema = None):
+        """
+
+        PUBLIC METHOD
+
+
+        path (str): Archivo de salida.
+
+        format (str): 'csv', 'parquet' o 'feather'. Por defecto se deduce de la extensión de [path].
+
+        schema (pa.Schema): Esquema de Arrow del archivo. Por defecto el del primer bloque; hace falta indicarlo si
+                            una columna puede venir vacía (solo np.nan) en el primer bloque.
+
+        Escribe un pd.DataFrame por bloques ([write]) en el mismo formato que [saveFrame], sin tenerlo entero en memoria.
+        El archivo queda igual que si se hubieran concatenado los bloques y guardado con [saveFrame].
+        """
+
+        self.path = path
+        self.format = format or frameFormat(path)
+        self.schema = schema
+        self.rows = 0
+        self._writer = None
+
+        if self.format != 'csv':
+            _requireArrow()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def write(self, data_frame):
+        """
+
+        PUBLIC METHOD
+
+
+        Añade las filas de [data_frame] al archivo.
+        """
+
+        if self.format == 'csv':
+            data_frame.to_csv(self.path, mode = 'w' if self.rows == 0 else 'a', header = self.rows == 0)
+            self.rows += len(data_frame)
+            return
+
+        table = _toArrow(data_frame)
+        if self._writer is None:
+            self.schema = self.schema or table.schema
+            if self.format == 'parquet':
+                self._writer = pq.ParquetWriter(self.path, self.schema)
+            else:
+                self._writer = ipc.new_file(self.path, self.schema)
+
+        if not table.schema.equals(self.schema):
+            try:
+                table = table.select(self.schema.names).cast(self.schema)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError, KeyError) as error:
+                raise ValueError(f"Chunk doesn't match the schema of '{self.path}', pass 'schema' explicitly: {error}") from error
+
+        self._writer.write_table(table)
+        self.rows += len(data_frame)
+
+    def close(self):
+        """
+
+        PUBLIC METHOD
+
+
+        Cierra el archivo. Sin bloques escritos, deja un csv vacío o no crea el archivo.
+        """
+
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+def _requireArrow():
+    if pa is None:
+        raise ImportError("pyarrow is required for the 'parquet' and 'feather' formats: pip install pyarrow")
+
+def _isNull(x):
+    return x is None or (isinstance(x, float) and np.isnan(x))
+
+def _toArrow(data_frame):
+    _requireArrow()
+
+    arrays = []
+    for column in data_frame.columns:
+        series = data_frame[column]
+        try:
+            arrays.append(pa.array(series, from_pandas = True))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            #Columnas con tipos mezclados: se guardan como texto, igual que en el csv
+            arrays.append(pa.array(series.apply(lambda x : x if _isNull(x) else str(x)), from_pandas = True))
+    return pa.Table.from_arrays(arrays, names = [str(column) for column in data_frame.columns])
+
+def _fromArrow(table):
+    df = table.to_pandas()
+
+    #Arrow devuelve las listas como np.ndarray, las pasamos a listas de Python una sola vez por columna. Los nulos
+    #vuelven como None (dentro de las listas de texto y en las columnas de texto), se cambian por np.nan
+    for name, column in zip(table.column_names, table.columns):
+        if pa.types.is_list(column.type) or pa.types.is_large_list(column.type):
+            if any(chunk.values.null_count for chunk in column.chunks):
+                values = [[np.nan if v is None else v for v in x.tolist()] if isinstance(x, np.ndarray) else np.nan for x in df[name]]
+            else:
+                values = [x.tolist() if isinstance(x, np.ndarray) else np.nan for x in df[name]]
+            df[name] = pd.Series(values, index = df.index, dtype = object)
+        elif column.null_count and df[name].dtype == object:
+            df[name] = df[name].fillna(np.nan)
+    return df
@@ -1,13 +1,38 @@
 import numpy as np
 import pandas as pd
 import ast
-import requests
+import gc
+import hashlib
+import itertools
+import json
+import os
+import re
 
 from time import time
 from datetime import datetime
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+from network import decodeJSON, defaultClient
+from profiling import profiled
+
+@contextmanager
+def _pausedGC():
+    #Crear cientos de miles de listas dispara el recolector de ciclos, que recorre todos los objetos
+    #de los DataFrames una y otra vez. Lo pausamos mientras se construyen y lo restauramos al terminar.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
 
 def removeNaFromLists(row):
-    if row is not np.nan:
+    #Se compara el valor y no la identidad con np.nan: los np.nan que vuelven de pickle (otro proceso, parquet...)
+    #son otro objeto float
+    if not (isinstance(row, float) and np.isnan(row)):
         return [x for x in row if not pd.isna(x)]
     return row
 
@@ -16,75 +41,43 @@ def removeEmptyLists(row):
         return np.nan
     else:
         return row
-    
-def _unpackLists(series):
-    data = []
-    for list_ in series.iloc:
-        if isinstance(list_, list):
-            data.extend(list_)
-    df = pd.DataFrame(data).rename(columns = {0 : f'{series.name}'})
-    return df
-
-def _getCounts(data_frame, column):
-    df = data_frame.groupby(column).size().reset_index(name = f'{column}_count')
-    return df
-
-def _concatCounts(data_frames, columns, main_column, axis = 0):
-    data = _getMultipleCounts(data_frames = data_frames,
-                          columns = columns,
-                          main_column = main_column)
-    df = pd.concat(data, axis = axis)
-    return df
-
-def _getMultipleCounts(data_frames, columns, main_column):
-    counts = []
-    for data_frame, column in zip(data_frames, columns):
-        counts.append(_getCounts(data_frame, column))
-    
-    data = []
-    for index, count in enumerate(counts):
-        if index == 0:
-            data.append(count[[columns[index] ,f'{columns[index]}_count']].rename(columns = {columns[index] : main_column}))
-            continue
-        
-        data.append(count[[f'{columns[index]}_count']])
-    return data
 
-def loadToAirtable(key, app, tbls, data_frame):
+AIRTABLE_URL = "https://api.airtable.com/v0"
+
+@profiled()
+def loadToAirtable(key, app, tbls, data_frame, table_size = 50000, workers = 5, rate_limit = 5, retries = 5, chunk_size = 1000, show_logs = True, base_url = AIRTABLE_URL, client = None, first_row = 0):
+    """
+    Carga [data_frame] en las tablas [tbls] de la base [app], [table_size] filas por tabla y 10 records por request
+    (el máximo de Airtable). Las requests se envían con hasta [workers] en vuelo, limitadas a [rate_limit] por segundo
+    (Airtable permite 5 por base), y se reintentan con backoff si la API responde 429. Con 5xx no se reintentan, porque
+    Airtable puede haber creado ya los records y se duplicarían.
+    Los records se construyen por bloques de [chunk_size] filas a medida que se envían, no todos al principio.
+    [client] es el network.HttpClient con el que se envían; por defecto el compartido.
+    [first_row] es la posición de la primera fila de [data_frame] en el conjunto completo, para cargarlo por bloques
+    (Data.transformChunks) y que cada fila acabe en la misma tabla que si se cargara todo de una vez.
+    """
+
     start = time()
-    
-    df = data_frame.copy()
-    
-    airtable_base_url = "https://api.airtable.com/v0"
-    
-    endpoints = [f"{airtable_base_url}/{app}/{tbl}" for tbl in tbls]
+
+    endpoints = [f"{base_url}/{app}/{tbl}" for tbl in tbls]
 
     headers = {"Authorization" : f"Bearer {key}",
                "Content-Type"  : "application/json"}
 
-    df.fillna('', inplace = True)
-    df = df[df.columns].astype(str)
-    
-    datos_json = [{"fields" : df.iloc[i, :].to_dict()} for i in range(df.shape[0])]
-    
-    for offset, endpoint in zip(range(0, len(datos_json), 50000), endpoints):
-        for i in range(offset, offset + 50000, 10):
-            data_ = {"records" : datos_json[i : i + 10]}
+    if len(endpoints) * table_size < first_row + data_frame.shape[0]:
+        raise ValueError(f"{first_row + data_frame.shape[0]} rows don't fit in {len(endpoints)} tables of {table_size} rows!")
 
-            startResponse = time()
-            
-            response = requests.post(url = endpoint, json = data_, headers = headers) # POST
-            
-            endResponse = time()
-            responseTime = endResponse - startResponse
-            
-            now = datetime.strftime(datetime.now(), '%x %X')
+    client = _airtableClient(client, base_url, rate_limit)
+
+    jobs = ((f'Table {table + 1} | Batch {batch + 1}', 'POST', endpoints[table], {"json" : {"records" : records}})
+            for table, batch, records in _airtableBatches(data_frame, table_size, chunk_size, first_row = first_row))
+
+    for _ in _airtableSend(jobs, headers, client, workers, retries, start, show_logs, stage = 'airtable_load'):
+        pass
 
-            log_str = f'[REQUEST] | {now} | Status {response.status_code} | Table {round((offset/50000) + 1)} | Batch {round(i/10 + 1)} | Response time [{round(responseTime, 2)}s] | Time elapsed [{round(endResponse - start, 2)}s]'
-            
-            print(log_str)
-            
     end = time()
+    client.metrics.inc('rows', data_frame.shape[0], stage = 'airtable_load')
+    client.metrics.inc('stage_seconds', end - start, stage = 'airtable_load')
     duration = round(end - start)
     hours = duration // 60 // 60
     minutes = duration // 60 % 60
@@ -93,13 +86,272 @@ def loadToAirtable(key, app, tbls, data_frame):
     #Registro
     now = datetime.strftime(datetime.now(), '%x %X')
     log_str = f'[loadToAirtable] | {now} | LOADING FINISHED | TOTAL TIME: {hours} hours, {minutes} minutes and {seconds} seconds'
-    
-    print(log_str)
-    
+
+    if show_logs:
+        print(log_str)
+
+@profiled()
+def syncToAirtable(key, app, tbls, data_frame, key_field = 'id', table_size = 50000, workers = 5, rate_limit = 5, retries = 5, chunk_size = 1000, delete = True, cache_path = None, refresh = False, show_logs = True, base_url = AIRTABLE_URL, client = None):
+    """
+    Sincroniza las tablas [tbls] de la base [app] con [data_frame] usando la columna [key_field] como clave.
+    Solo se envían los records nuevos o que han cambiado, con PATCH performUpsert sobre [key_field] (10 por request),
+    y se borran los que ya no están en [data_frame] (si [delete]) y los duplicados de una misma clave.
+    Los records nuevos van a la primera tabla con menos de [table_size] records.
+
+    Para comparar hace falta el id de record y un hash del contenido de cada clave: se leen de [cache_path] si existe
+    (y no se pide [refresh]) o se descargan las tablas de Airtable. Al terminar se guardan en [cache_path].
+    Repetir la sincronización sin cambios en los datos no envía ninguna request de escritura.
+    Devuelve un diccionario con el número de records creados, actualizados, borrados y sin cambios.
+    """
+
+    start = time()
+
+    endpoints = {tbl : f"{base_url}/{app}/{tbl}" for tbl in tbls}
+
+    headers = {"Authorization" : f"Bearer {key}",
+               "Content-Type"  : "application/json"}
+
+    client = _airtableClient(client, base_url, rate_limit)
+    columns = [str(column) for column in data_frame.columns]
+
+    #Estado actual: clave -> [tabla, id de record, hash]
+    index = _airtableIndex(cache_path, app, key_field) if cache_path and not refresh else None
+    duplicates = []
+    if index is None:
+        index, duplicates = _airtableListIndex(endpoints, headers, client, retries, key_field, columns)
+
+    #Clave y hash de cada fila, por bloques y sin guardar los records
+    keys, hashes = [], []
+    for chunk in range(0, data_frame.shape[0], chunk_size):
+        records = _airtableStrings(data_frame.iloc[chunk : chunk + chunk_size]).to_dict('records')
+        keys.extend(fields[key_field] for fields in records)
+        hashes.extend(_airtableHash(fields, columns) for fields in records)
+
+    #Si una clave está repetida en [data_frame] se queda la última fila
+    last = {k : position for position, k in enumerate(keys)}
+
+    counts = {tbl : 0 for tbl in tbls}
+    for tbl, _, _ in index.values():
+        counts[tbl] = counts.get(tbl, 0) + 1
+
+    deletes = {tbl : [] for tbl in tbls}
+    for tbl, record in duplicates:
+        deletes[tbl].append(record)
+    if delete:
+        for k, (tbl, record, _) in index.items():
+            if k not in last:
+                deletes[tbl].append(record)
+                counts[tbl] -= 1
+
+    #Filas a enviar por tabla: las cambiadas a su tabla actual, las nuevas a la primera tabla con sitio
+    upserts = {tbl : [] for tbl in tbls}
+    unchanged = created = 0
+    for k, position in last.items():
+        if k in index:
+            tbl, _, hash_ = index[k]
+            if hash_ == hashes[position]:
+                unchanged += 1
+            else:
+                upserts[tbl].append(position)
+            continue
+
+        tbl = next((tbl for tbl in tbls if counts[tbl] < table_size), None)
+        if tbl is None:
+            raise ValueError(f"{len(last)} rows don't fit in {len(tbls)} tables of {table_size} rows!")
+        counts[tbl] += 1
+        upserts[tbl].append(position)
+        created += 1
+
+    def deleteJobs():
+        for tbl, records in deletes.items():
+            for batch, i in enumerate(range(0, len(records), 10)):
+                yield (f'Table {tbl} | Delete {batch + 1}', 'DELETE', endpoints[tbl], {"params" : {"records[]" : records[i : i + 10]}})
+
+    def upsertJobs():
+        for tbl, positions in upserts.items():
+            positions = sorted(positions)
+            for chunk in range(0, len(positions), chunk_size):
+                df = _airtableStrings(data_frame.iloc[positions[chunk : chunk + chunk_size]])
+                records = [{"fields" : fields} for fields in df.to_dict('records')]
+
+                for i in range(0, len(records), 10):
+                    body = {"performUpsert" : {"fieldsToMergeOn" : [key_field]}, "records" : records[i : i + 10]}
+                    yield (f'Table {tbl} | Upsert {(chunk + i) // 10 + 1}', 'PATCH', endpoints[tbl], {"json" : body, "idempotent" : True})
+
+    deleted = set(record for records in deletes.values() for record in records)
+
+    #Las claves borradas salen del índice solo cuando Airtable confirma el DELETE, así si falla a mitad
+    #la caché sigue teniendo los records que no se han llegado a borrar
+    keysByRecord = {value[1] : k for k, value in index.items()}
+
+    try:
+        tables = {endpoint : tbl for tbl, endpoint in endpoints.items()}
+
+        #Dos fases: primero todos los DELETE y, cuando están confirmados, los upserts. Si un upsert llega mientras
+        #sigue existiendo un duplicado de su clave, el merge sobre [key_field] es ambiguo y Airtable responde 422
+        for jobs in [deleteJobs(), upsertJobs()]:
+            for url, response in _airtableSend(jobs, headers, client, workers, retries, start, show_logs, stage = 'airtable_sync'):
+                tbl = tables[url]
+                for record in decodeJSON(response.content)['records']:
+                    if 'fields' in record:
+                        fields = record['fields']
+                        index[fields.get(key_field)] = [tbl, record['id'], _airtableHash(fields, columns)]
+                    elif record.get('deleted'):
+                        k = keysByRecord.pop(record['id'], None)
+                        if k in index and index[k][1] == record['id']:
+                            del index[k]
+    finally:
+        #Aunque falle a mitad, lo ya enviado queda en la caché
+        if cache_path:
+            _saveAirtableIndex(cache_path, app, key_field, index)
+
+    end = time()
+    duration = round(end - start)
+    hours = duration // 60 // 60
+    minutes = duration // 60 % 60
+    seconds = duration % 60
+
+    summary = {'created' : created,
+               'updated' : sum(len(positions) for positions in upserts.values()) - created,
+               'deleted' : len(deleted),
+               'unchanged' : unchanged}
+
+    client.metrics.inc('rows', data_frame.shape[0], stage = 'airtable_sync')
+    client.metrics.inc('stage_seconds', end - start, stage = 'airtable_sync')
+
+    #Registro
+    now = datetime.strftime(datetime.now(), '%x %X')
+    log_str = f'[syncToAirtable] | {now} | SYNC FINISHED | CREATED {summary["created"]} | UPDATED {summary["updated"]} | DELETED {summary["deleted"]} | UNCHANGED {summary["unchanged"]} | TOTAL TIME: {hours} hours, {minutes} minutes and {seconds} seconds'
+
+    if show_logs:
+        print(log_str)
+    return summary
+
+def _airtableHash(fields, columns):
+    #Hash del contenido de un record limitado a las columnas del DataFrame. Los campos vacíos no cuentan
+    #porque Airtable no los devuelve.
+    content = {column : fields[column] for column in columns if fields.get(column, '') != ''}
+    return hashlib.md5(json.dumps(content, sort_keys = True).encode()).hexdigest()
+
+def _airtableIndex(cache_path, app, key_field):
+    #Lee la caché de [syncToAirtable]. None si no existe o es de otra base o de otra clave.
+    if not os.path.exists(cache_path):
+        return None
+
+    with open(cache_path) as file:
+        cache = json.load(file)
+
+    if cache.get('app') != app or cache.get('key_field') != key_field:
+        return None
+    return cache['records']
+
+def _saveAirtableIndex(cache_path, app, key_field, index):
+    tmp = f'{cache_path}.tmp'
+    with open(tmp, 'w') as file:
+        json.dump({'app' : app, 'key_field' : key_field, 'records' : index}, file)
+    os.replace(tmp, cache_path)
+
+def _airtableListIndex(endpoints, headers, client, retries, key_field, columns):
+    #Descarga todas las tablas y construye el índice clave -> [tabla, id de record, hash].
+    #Los records repetidos de una misma clave se devuelven aparte como (tabla, id de record).
+    #Nunca se lee de la caché del cliente: el índice tiene que reflejar el estado actual de las tablas.
+    index, duplicates = {}, []
+    for tbl, endpoint in endpoints.items():
+        for page in _airtablePages(endpoint, headers, client, retries, cacheable = False, stage = 'airtable_sync'):
+            for record in page:
+                k = record['fields'].get(key_field)
+                if k is None:
+                    continue
+                if k in index:
+                    duplicates.append((tbl, record['id']))
+                else:
+                    index[k] = [tbl, record['id'], _airtableHash(record['fields'], columns)]
+    return index, duplicates
+
+def _airtablePages(endpoint, headers, client, retries = 5, params = None, cacheable = None, stage = None):
+    #Recorre las páginas (100 records como máximo) de una tabla siguiendo el offset de Airtable
+    params = dict(params or {})
+    params.setdefault("pageSize", 100)
+
+    while True:
+        response, _ = client.request('GET', endpoint, headers = headers, retries = retries, params = params, cacheable = cacheable, stage = stage)
+        page = decodeJSON(response.content)
+        yield page["records"]
+
+        if page.get("offset") is None:
+            break
+        params["offset"] = page["offset"]
+
+def _airtableBatches(data_frame, table_size = 50000, chunk_size = 1000, batch_size = 10, first_row = 0):
+    #Genera (tabla, batch, records) recorriendo el DataFrame por bloques. Cada bloque se convierte a texto
+    #y a diccionarios con to_dict('records') de una vez, en lugar de fila a fila con iloc.
+    #Las posiciones son del conjunto completo: la fila i de [data_frame] es la [first_row] + i.
+    last = first_row + data_frame.shape[0]
+    for offset in range(first_row - first_row % table_size, last, table_size):
+        table = offset // table_size
+        begin, end = max(offset, first_row), min(offset + table_size, last)
+
+        for chunk in range(begin, end, chunk_size):
+            df = _airtableStrings(data_frame.iloc[chunk - first_row : min(chunk + chunk_size, end) - first_row])
+            records = [{"fields" : fields} for fields in df.to_dict('records')]
+
+            for i in range(0, len(records), batch_size):
+                yield table, (chunk - offset + i) // batch_size, records[i : i + batch_size]
+
+def _airtableStrings(data_frame):
+    #Texto de cada celda tal como se envía a Airtable, con '' en los vacíos. Se pasa antes a object para que
+    #los enteros con pd.NA (Int8, Int16... de Data.parseDates) también se puedan rellenar con ''
+    return data_frame.astype(object).fillna('').astype(str)
+
+def _airtableClient(client, base_url, rate_limit):
+    #Cliente HTTP con el límite de requests por segundo de Airtable aplicado a su host
+    client = client or defaultClient()
+    client.limit(base_url, rate_limit)
+    return client
+
+def _airtableSend(jobs, headers, client, workers = 5, retries = 5, start = None, show_logs = True, stage = None):
+    #Envía los jobs (descripción, método, url, kwargs) con hasta [workers] requests en vuelo y devuelve
+    #(url, respuesta) en el orden de los jobs. Como mucho hay 2 * [workers] jobs construidos a la vez.
+    start = start or time()
+    pending = deque()
+
+    def result(description, url, future):
+        response, responseTime = future.result()
+
+        now = datetime.strftime(datetime.now(), '%x %X')
+
+        log_str = f'[REQUEST] | {now} | Status {response.status_code} | {description} | Response time [{round(responseTime, 2)}s] | Time elapsed [{round(time() - start, 2)}s]'
+
+        if show_logs:
+            print(log_str)
+        return url, response
+
+    with ThreadPoolExecutor(max_workers = workers) as pool:
+        try:
+            for description, method, url, kwargs in jobs:
+                pending.append((description, url, pool.submit(client.request, method, url, headers = headers, retries = retries, stage = stage, **kwargs)))
+
+                if len(pending) >= 2 * workers:
+                    yield result(*pending.popleft())
+
+            while pending:
+                yield result(*pending.popleft())
+        finally:
+            for _, _, future in pending:
+                future.cancel()
+
+#Formato de IGDB para las listas de id's guardadas como texto: '[1, 2, 3]'
+_INT_LIST = r'\[\s*(?:-?\d{1,18}\s*(?:,\s*-?\d{1,18}\s*)*)?\]'
+_INT = r'\s*-?\d{1,18}\s*'
+_INT_LIST_RE = re.compile(_INT_LIST)
+
 def parseStr(s):
     if pd.isna(s):
         return s
 
+    if isinstance(s, str) and _INT_LIST_RE.fullmatch(s):
+        return _decodeIntLists([s])[0]
+
     try:
         return ast.literal_eval(s)
     except (ValueError, SyntaxError, TypeError):
@@ -111,56 +363,108 @@ def parseStr(s):
         pass
 
     return s
-    
 
-def extractTbl(key, app, tbl):
-    airtable_base_url = "https://api.airtable.com/v0"
-    
-    endpoint = f"{airtable_base_url}/{app}/{tbl}"
+@profiled()
+def parseStrColumn(series, parser = parseStr):
+    #Versión por columna de [parser]: las listas de enteros '[1, 2, 3]' y los enteros se decodifican todos
+    #de una vez y solo el resto de cadenas pasa por [parser] (ast.literal_eval) celda a celda.
+    #Los valores que no son str se dejan igual.
+    values = series.to_numpy(dtype = object)
+    result = values.copy()
+
+    isStr = np.fromiter(map(isinstance, values, itertools.repeat(str)), dtype = bool, count = len(values))
+    positions = np.flatnonzero(isStr)
+    strings = pd.Series(values[isStr], dtype = object)
+
+    isList = strings.str.fullmatch(_INT_LIST).to_numpy(dtype = bool)
+    isInt = np.zeros(len(strings), dtype = bool)
+    isInt[~isList] = strings[~isList].str.fullmatch(_INT).to_numpy(dtype = bool)
+    isNan = (strings == 'nan').to_numpy()
+    isRest = ~(isList | isInt | isNan)
+
+    result[positions[isList]] = _objectArray(_decodeIntLists(strings[isList].tolist()))
+    result[positions[isInt]] = strings[isInt].astype(np.int64).to_numpy(dtype = object)
+    result[positions[isRest]] = _objectArray([parser(s) for s in strings[isRest]])
+
+    return pd.Series(result, index = series.index, name = series.name).infer_objects()
+
+def _decodeIntLists(strings):
+    #Todas las listas se unen en un único texto que numpy convierte de golpe en un array int64 plano.
+    #Con el número de elementos de cada lista se vuelve a trocear en listas de Python.
+    inner = [s.strip()[1:-1].strip() for s in strings]
+    counts = [s.count(',') + 1 if s else 0 for s in inner]
+
+    flat = np.fromstring(','.join(filter(None, inner)), dtype = np.int64, sep = ',').tolist()
+
+    with _pausedGC():
+        ends = itertools.accumulate(counts)
+        return [flat[end - count : end] for end, count in zip(ends, counts)]
+
+def _objectArray(items):
+    #Array de objetos 1D aunque los elementos sean listas (np.array intentaría crear un array 2D)
+    return pd.Series(items, dtype = object).to_numpy()
+
+
+def iterAirtable(key, app, tbls, rate_limit = 5, retries = 5, base_url = AIRTABLE_URL, client = None):
+    """
+    Recorre los records (diccionarios con 'id', 'createdTime' y 'fields') de las tablas [tbls] uno a uno,
+    pidiendo cada página de 100 records cuando hace falta. No guarda las tablas en memoria.
+    """
 
     headers = {"Authorization" : f"Bearer {key}",
                "Content-Type"  : "application/json"}
-    
-    params = {"offset" : None}
 
-    df_airtable = pd.DataFrame()
+    client = _airtableClient(client, base_url, rate_limit)
 
-    while params.get("offset") != None or df_airtable.shape[0] == 0:
+    for tbl in tbls:
+        for page in _airtablePages(f"{base_url}/{app}/{tbl}", headers, client, retries, stage = 'airtable_extract'):
+            yield from page
 
-        response = requests.get(url = endpoint, headers = headers, params = params)
+@profiled()
+def extractTbl(key, app, tbl, rate_limit = 5, retries = 5, show_logs = False, base_url = AIRTABLE_URL, client = None):
+    """
+    Descarga la tabla [tbl] y la devuelve como pd.DataFrame (columnas 'id', 'createdTime' y 'fields.{campo}').
+    Las páginas se acumulan en una lista y se convierten a DataFrame una sola vez al final.
+    """
 
-        print(response.url)
+    records = _extractRecords(key, app, tbl, retries, show_logs, base_url, _airtableClient(client, base_url, rate_limit))
+    return pd.json_normalize(records)
 
-        print(f"response: {response.status_code}")
+@profiled()
+def extractFromAirtable(key, app, tbls, workers = 5, rate_limit = 5, retries = 5, show_logs = False, base_url = AIRTABLE_URL, client = None):
+    """
+    Descarga las tablas [tbls] (hasta [workers] a la vez, compartiendo el límite de [rate_limit] requests por segundo)
+    y devuelve un único pd.DataFrame con los campos, con las listas y números guardados como texto ya parseados.
+    """
 
-        params["offset"] = response.json().get("offset")
+    client = _airtableClient(client, base_url, rate_limit)
 
-        print(params.get("offset"))
+    with client.metrics.timer('stage_seconds', stage = 'airtable_extract'):
+        with ThreadPoolExecutor(max_workers = max(1, min(workers, len(tbls)))) as pool:
+            tables = list(pool.map(lambda tbl : _extractRecords(key, app, tbl, retries, show_logs, base_url, client), tbls))
 
-        df_airtable = pd.concat([df_airtable, pd.json_normalize(response.json()["records"])], ignore_index = True)
-        
-        print(df_airtable.shape[0])
-        
-        if (params.get("offset") == None and df_airtable.shape[0] == 0):
-            break
+        df_airtable = pd.DataFrame([record["fields"] for records in tables for record in records])
 
+        for column in df_airtable.columns:
+            df_airtable[column] = parseStrColumn(df_airtable[column])
+            
+        df_airtable = df_airtable.replace('nan', np.nan)
+    
+    client.metrics.inc('rows', df_airtable.shape[0], stage = 'airtable_extract')
     return df_airtable
 
-def extractFromAirtable(key, app, tbls):
-    df_airtable = pd.DataFrame()
-    
-    for tbl in tbls:
-        extracted_df = extractTbl(key, app, tbl)
-    
-        df_airtable = pd.concat([df_airtable, extracted_df], ignore_index = True)
-    
-    df_airtable = df_airtable[df_airtable.columns[2:]]
-    
-    df_airtable = df_airtable.rename(columns = {x : x.split('.')[1] for x in df_airtable.columns})
+def _extractRecords(key, app, tbl, retries, show_logs, base_url, client):
+    endpoint = f"{base_url}/{app}/{tbl}"
 
-    for column in df_airtable.columns:
-        df_airtable[column] = df_airtable[column].apply(parseStr)
-        
-    df_airtable = df_airtable.replace('nan', np.nan)
-    
-    return df_airtable
\ No newline at end of file
+    headers = {"Authorization" : f"Bearer {key}",
+               "Content-Type"  : "application/json"}
+
+    start = time()
+    records = []
+    for page in _airtablePages(endpoint, headers, client, retries, stage = 'airtable_extract'):
+        records.extend(page)
+
+        if show_logs:
+            now = datetime.strftime(datetime.now(), '%x %X')
+            print(f'[REQUEST] | {now} | Table {tbl} | Records {len(records)} | Time elapsed [{round(time() - start, 2)}s]')
+    return records
@@ -1,27 +1,24 @@
 import plotly.express as px
 
-from datetime import datetime
 import pandas as pd
 import numpy as np
 
 # custom libraries
-from util import _unpackLists, _concatCounts
+from cube import MONTHS, aggregateCube
+from profiling import profiled
 
-def languages_fig(dataframe):
-    #se crea una lista con todos los supports de audio y se mete en un dataframe
-    audio_languages_df = _unpackLists(dataframe['audio_language_supports'])
-
-    #se hace lo mismo con los subtitulos
-    subtitles_languages_df = _unpackLists(dataframe['subtitles_language_supports'])
+#Todas las gráficas reciben el pd.DataFrame de juegos o, mejor, su cube.AggregateCube ya calculado
+#(AggregateCube.load(dataframe)), así los datos se recorren una sola vez para las cinco gráficas.
 
+@profiled()
+def languages_fig(dataframe):
+    cube = aggregateCube(dataframe)
 
     #se crea un nuevo dataframe con la columna language, audio_count y subtitles_count.
     #este dataframe contiene las veces que aparece un lenguaje en audio_language_supports y subtitles_language_supports
-    grouped_language_supports_df = _concatCounts(data_frames = [audio_languages_df, subtitles_languages_df],
-                              columns = ['audio_language_supports', 'subtitles_language_supports'],
-                              main_column = 'language',
-                  axis = 1
-                 )
+    #(los conteos se alinean por lenguaje, un lenguaje que solo aparece en uno de los dos tiene 0 en el otro)
+    grouped_language_supports_df = pd.concat([cube.totals(column).rename(f'{column}_count') for column in ['audio_language_supports', 'subtitles_language_supports']], axis = 1)
+    grouped_language_supports_df = grouped_language_supports_df.fillna(0).astype('int64').sort_index().rename_axis('language').reset_index()
 
     grouped_language_supports_df['total_count'] = grouped_language_supports_df['audio_language_supports_count'] + grouped_language_supports_df['subtitles_language_supports_count']
 
@@ -32,9 +29,12 @@ def languages_fig(dataframe):
     
     return languages_fig
 
+@profiled()
 def releases_fig(dataframe):
+    cube = aggregateCube(dataframe)
+
     #agrupamos por mes y año y sacamos los counts de cada mes de cada año
-    grouped_df = dataframe.groupby(['month_release', 'year_release']).size().reset_index(name='count')
+    grouped_df = cube.rowCounts(['month_release', 'year_release']).reset_index(name='count')
 
     #casteamos a int los años y meses para evitar errores en el cast a string
     grouped_df['year_release'] = grouped_df['year_release'].astype(int)
@@ -44,17 +44,17 @@ def releases_fig(dataframe):
     #ordenamos los meses
     grouped_df = grouped_df.sort_values(['month_release', 'year_release'])
 
-    #cambiamos los meses de número a string después de ordenarlos
-    grouped_df["month_release"] = grouped_df["month_release"].apply(lambda x : datetime.strptime(f'{x}', "%m").strftime("%b"))
+    #cambiamos los meses de número a su etiqueta después de ordenarlos
+    grouped_df["month_release"] = np.array(MONTHS, dtype = object)[grouped_df["month_release"].to_numpy() - 1]
 
     #agrupamos por año y sacamos los counts de cada año. Esto es para el calculo del promedio
-    grouped_months = dataframe.groupby('year_release').size().reset_index(name='count')
+    grouped_months = cube.rowCounts('year_release').reset_index(name='count')
 
     #dividimos los counts entre 12 para el promedio
-    grouped_months['count'] = grouped_months['count'].apply(lambda x : x/12)
+    grouped_months['count'] = grouped_months['count'] / 12
 
     #modificamos la columna de month_release para que en lugar de aparecer un mes aparezca MEAN en el color del plotly express
-    grouped_months['month_release'] = ['MEAN' for x in grouped_months.iloc]
+    grouped_months['month_release'] = 'MEAN'
 
     #concatenamos el dataframe del promedio con el de los meses agrupados verticalmente
     grouped_df = pd.concat([grouped_df, grouped_months], axis = 0)
@@ -68,12 +68,12 @@ def releases_fig(dataframe):
            )
     return releases_fig
 
+@profiled()
 def engines_fig(dataframe):
-    #se crea una lista con todos los game_engines y se mete en un dataframe
-    engines_df = _unpackLists(dataframe['game_engines'])
+    cube = aggregateCube(dataframe)
 
-    #se cuenta cuantas veces aparece cada motor y se crea un nuevo dataframe con los datos
-    engine_counts_df = pd.DataFrame(engines_df.value_counts()).rename(columns = {0 : 'count'}).reset_index().rename(columns = {0 : 'engines'})
+    #se cuenta cuantas veces aparece cada motor y se crea un nuevo dataframe con los datos (mismo orden que value_counts)
+    engine_counts_df = _valueCounts(cube, 'game_engines').reset_index()
 
     #se asigna una etiqueta top5 a cada motor para una visualización más interactiva
     engine_counts_df = engine_counts_df.sort_values('count', ascending = False)
@@ -87,44 +87,19 @@ def engines_fig(dataframe):
                 )
     return engines_fig.update_layout(width = 900, height = 800)
 
+@profiled()
 def engines_years_fig(dataframe):
-    engines_years_df = dataframe[['game_engines', 'year_release']].dropna()
-
-    engines_only = _unpackLists(dataframe['game_engines'])
-    engine_counts_df = pd.DataFrame(engines_only.value_counts()).rename(columns = {0 : 'count'}).reset_index().rename(columns = {0 : 'engines'})
-    top10 = list(engine_counts_df.sort_values('count', ascending = False).head(10)['game_engines'])
-
-    engines_year_dict = {}
-
-    for year in engines_years_df['year_release'].iloc:
-        engines_year_dict[year] = []
-
-    for engines, year in zip(engines_years_df['game_engines'].iloc, engines_years_df['year_release'].iloc):
-        engines_year_dict[year].extend(engines)
-
-    for year, engines in engines_year_dict.items():
-        engines_dict = {}
-
-        engines_ = []
-        for engine in dataframe['game_engines'].iloc:
-            if isinstance(engine, (list, np.ndarray)):
-                engines_.extend(engine)
-
-        unique_engines = list(set(engines_))
-
-        for engine in unique_engines:
-            engines_dict[engine] = 0
+    cube = aggregateCube(dataframe)
 
-        for engine in engines:
-            engines_dict[engine] = engines_dict[engine] + 1
+    #los 10 motores más usados
+    top10 = list(cube.top('game_engines', 10).index)
 
-        engines_year_dict[year] = engines_dict
+    #matriz motor x año, solo de esos motores, con las veces que aparece cada uno en los juegos de cada año (0 si no aparece)
+    engines_years_df = cube.matrix('game_engines', 'year_release', values = top10).rename_axis(index = None, columns = None)
 
-    df_melt = pd.DataFrame(engines_year_dict).reset_index().melt(id_vars='index', var_name='Year', value_name='Value')
+    df_melt = engines_years_df.reset_index().melt(id_vars='index', var_name='Year', value_name='Value')
     df_melt.rename(columns={'index':'Engine'}, inplace=True)
 
-    df_melt = df_melt[df_melt['Engine'].isin(top10)]
-
     engines_years_fig = px.line(data_frame = df_melt.sort_values(['Year', 'Value'], ascending = True),
                                 x = 'Year',
                                 y = 'Value',
@@ -132,38 +107,15 @@ def engines_years_fig(dataframe):
                                )
     return engines_years_fig
 
+@profiled()
 def genres_categories_fig(dataframe):
-    genres_categories_df = dataframe[['genres', 'category']].dropna()
-
-    genres_categories_dict = {}
-
-    for category in genres_categories_df['category'].iloc:
-        genres_categories_dict[category] = []
-
-    for genres, category in zip(genres_categories_df['genres'].iloc, genres_categories_df['category'].iloc):
-        genres_categories_dict[category].extend(genres)
-
-    for category, genres in genres_categories_dict.items():
-        genres_dict = {}
-
-        genres_ = []
-        for genre in dataframe['genres'].iloc:
-            if isinstance(genre, (list, np.ndarray)):
-                genres_.extend(genre)
+    cube = aggregateCube(dataframe)
 
-        unique_genres = list(set(genres_))
+    #matriz género x categoría con las veces que aparece cada género en los juegos de cada categoría (0 si no aparece)
+    genres_categories_df = cube.matrix('genres', 'category').rename_axis(index = None, columns = None)
+    genres_categories_df = genres_categories_df.drop(columns = 'main_game', errors = 'ignore')
 
-        for genre in unique_genres:
-            genres_dict[genre] = 0
-
-        for genre in genres:
-            genres_dict[genre] = genres_dict[genre] + 1
-
-        genres_categories_dict[category] = genres_dict
-    
-    del genres_categories_dict['main_game']
-
-    df_melt = pd.DataFrame(genres_categories_dict).reset_index().melt(id_vars='index', var_name='category', value_name='value')
+    df_melt = genres_categories_df.reset_index().melt(id_vars='index', var_name='category', value_name='value')
     df_melt.rename(columns={'index':'genre'}, inplace=True)
     
     genres_categories_fig = px.treemap(data_frame = df_melt,
@@ -172,4 +124,9 @@ def genres_categories_fig(dataframe):
                                    color      = 'genre',
                                    color_continuous_scale = 'green'
                                   )
-    return genres_categories_fig
\ No newline at end of file
+    return genres_categories_fig
+
+def _valueCounts(cube, column):
+    #Mismo resultado (y mismo orden en los empates) que value_counts sobre la columna explotada
+    counts = cube.totals(column).sort_index().rename('count')
+    return counts.sort_values(ascending = False)